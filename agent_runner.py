@@ -0,0 +1,181 @@
+'''author__ = 'Alberto Costa'
+   mail = 'noobsajbot@gmail.com'
+   date = '18 Oct 2026'
+
+   asyncio runner of the agent: off the calling thread, with timeout, cancellation and rate-limit backoff
+'''
+
+import asyncio
+import concurrent.futures
+import email.utils
+import random
+import re
+import threading
+import time
+
+
+class AgentTimeout(TimeoutError):
+    '''
+    The agent did not answer within the timeout
+    '''
+
+
+class AgentCancelled(Exception):
+    '''
+    The agent was cancelled before answering
+    '''
+
+
+def _start_thread(function, *args):
+    #run function(*args) on a daemon thread and return a future with its result: an abandoned
+    #run (timeout, cancellation) is never joined, neither by asyncio.run nor at the interpreter exit
+    future = concurrent.futures.Future()
+
+    def target():
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            result = function(*args)
+        except BaseException as e:
+            future.set_exception(e)
+        else:
+            future.set_result(result)
+
+    threading.Thread(target=target, daemon=True, name='nirad-agent').start()
+    return future
+
+
+def _status_code(e):
+    status = getattr(e, 'status_code', None)
+    if status is None:
+        status = getattr(getattr(e, 'response', None), 'status_code', None)
+    return status
+
+
+def is_rate_limit(e):
+    '''
+    True if {e} is a rate limit or overload error of the LLM provider (worth retrying)
+    '''
+    status = _status_code(e)
+    if status in (429, 503):
+        return True
+    message = str(e).lower()
+    return '429' in message or 'rate limit' in message or 'resource_exhausted' in message
+
+
+def retry_after(e):
+    '''
+    Seconds to wait suggested by the provider (Retry-After headers, or a retry
+    delay in the error message), None if there is no hint
+    '''
+    headers = getattr(getattr(e, 'response', None), 'headers', None) or {}
+    try:
+        if 'retry-after-ms' in headers:
+            return float(headers['retry-after-ms']) / 1000
+        if 'retry-after' in headers:
+            value = headers['retry-after']
+            try:
+                return float(value)
+            except ValueError:
+                #HTTP date
+                return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        pass
+    match = re.search(r'retry[ _-]?(?:after|delay)\W*(\d+(?:\.\d+)?)', str(e), re.IGNORECASE)
+    if match:
+        return float(match.group(1))
+    return None
+
+
+def backoff_delay(attempt, hint=None, base_delay=2.0, max_delay=80.0):
+    '''
+    Delay before the retry number {attempt} (0-based): exponential backoff with full
+    jitter, at least the delay {hint} suggested by the provider
+    '''
+    delay = random.uniform(0, min(max_delay, base_delay * 2 ** attempt))
+    if hint is not None:
+        delay = max(delay, hint)
+    return delay
+
+
+async def run_agent(agent, prompt, timeout=None, max_retries=6, base_delay=2.0, max_delay=80.0):
+    '''
+    Run agent.run(prompt) on a daemon thread, the event loop stays free.
+    Rate limit errors are retried (up to {max_retries} times) after a jittered
+    backoff that honors the retry-after hints, other errors are raised.
+    If the task is cancelled or {timeout} seconds (whole run, retries included)
+    expire, the agent is interrupted at its next step and AgentTimeout (or
+    CancelledError) is raised.
+    '''
+    deadline = None if timeout is None else time.monotonic() + timeout
+    attempt = 0
+    while True:
+        remaining = None if deadline is None else deadline - time.monotonic()
+        try:
+            if remaining is not None and remaining <= 0:
+                raise asyncio.TimeoutError
+            return await asyncio.wait_for(asyncio.wrap_future(_start_thread(agent.run, prompt)), remaining)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            #the worker thread cannot be killed: ask the agent to stop at its next step
+            if hasattr(agent, 'interrupt'):
+                agent.interrupt()
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            raise AgentTimeout(f'no answer within {timeout} seconds')
+        except Exception as e:
+            if not is_rate_limit(e) or attempt >= max_retries:
+                raise
+            delay = backoff_delay(attempt, retry_after(e), base_delay, max_delay)
+            if deadline is not None:
+                delay = min(delay, max(0.0, deadline - time.monotonic()))
+            print(f"Rate limit hit. Retrying in {delay:.1f} seconds...")
+            await asyncio.sleep(delay)
+            attempt += 1
+
+
+class AgentRun:
+    '''
+    run_agent(agent, prompt, **kwargs) started on a daemon thread with its own event
+    loop, so the caller is not blocked: done() tells if the answer is there, result()
+    waits for it and cancel() interrupts the agent (also while it waits for a retry)
+    '''
+
+    def __init__(self, agent, prompt, **kwargs):
+        self.agent = agent
+        self._loop = asyncio.new_event_loop()
+        self._task = self._loop.create_task(run_agent(agent, prompt, **kwargs))
+        self._finished = threading.Event()
+        threading.Thread(target=self._run, daemon=True, name='nirad-agent-loop').start()
+
+    def _run(self):
+        try:
+            self._loop.run_until_complete(asyncio.wait([self._task]))
+        finally:
+            self._loop.close()
+            self._finished.set()
+
+    def done(self):
+        return self._finished.is_set()
+
+    def cancel(self):
+        '''
+        Stop the run: the agent is interrupted at its next step and result() raises AgentCancelled
+        '''
+        if self.done():
+            return
+        try:
+            self._loop.call_soon_threadsafe(self._task.cancel)
+        except RuntimeError:
+            #the loop has just been closed, the run is over
+            pass
+
+    def result(self, timeout=None):
+        '''
+        Answer of the agent, waiting at most {timeout} seconds (None to wait until the
+        run is over). Raise the error of the run, AgentTimeout or AgentCancelled.
+        '''
+        if not self._finished.wait(timeout):
+            raise TimeoutError(f'the agent is still running after {timeout} seconds')
+        if self._task.cancelled():
+            raise AgentCancelled('the agent was cancelled')
+        return self._task.result()
@@ -0,0 +1,28 @@
+'''author__ = 'Alberto Costa'
+   mail = 'noobsajbot@gmail.com'
+   date = '18 Oct 2026'
+
+   modules imported at their first use, to keep the start-up fast
+'''
+
+import importlib
+
+
+class LazyModule:
+    '''
+    Stand-in for the module {name}, imported at the first access to one of its
+    attributes (e.g. rob_opt = LazyModule('optimality_robust') builds the Pyomo
+    model only when rob_opt.model is used)
+    '''
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attribute):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attribute)
+
+    def __repr__(self):
+        return f"<lazy module '{self._name}'>"
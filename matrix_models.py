@@ -0,0 +1,198 @@
+'''author__ = 'Alberto Costa'
+   mail = 'noobsajbot@gmail.com'
+   date = '18 Oct 2026'
+
+   max flow, worst-case attack and fortification models built directly as sparse
+   matrices from the arc arrays (no Pyomo expressions), solved in-process with HiGHS
+   through scipy.optimize.milp. Same formulations as max_flow.py, optimality_robust.py
+   and feasibility_robust.py.
+'''
+
+from contextlib import nullcontext
+import numpy as np
+from scipy import sparse
+from scipy.optimize import milp, Bounds, LinearConstraint
+
+from solver_backends import SolverLimitReached
+
+
+def _phase(timer, name):
+    return timer.phase(name) if timer is not None else nullcontext()
+
+
+def _arc_arrays(data):
+    #tails, heads (0-based node indices, nodes are 1..n) and arc values in the order of data['A']
+    arcs = data['A'][None]
+    m = len(arcs)
+    tails = np.fromiter((i for (i, j) in arcs), dtype=np.int64, count=m) - 1
+    heads = np.fromiter((j for (i, j) in arcs), dtype=np.int64, count=m) - 1
+    capacity = np.fromiter(map(data['capacity'].__getitem__, arcs), dtype=np.float64, count=m)
+    cost = np.fromiter(map(data['cost'].__getitem__, arcs), dtype=np.float64, count=m)
+    return arcs, tails, heads, capacity, cost
+
+
+def _solve(c, integrality, bounds, constraints, options, time_limit=None):
+    if time_limit is not None:
+        options = dict(options or {})
+        options['time_limit'] = time_limit
+    result = milp(c, integrality=integrality, bounds=bounds, constraints=constraints, options=options)
+    if result.x is None:
+        if result.status == 1:
+            raise SolverLimitReached(f'HiGHS did not find a solution: {result.message}')
+        raise RuntimeError(f'HiGHS did not find a solution: {result.message}')
+    return result
+
+
+def _bound(result):
+    #best bound on the (minimized) objective proved by HiGHS
+    if result.status == 0:
+        return result.fun
+    bound = getattr(result, 'mip_dual_bound', None)
+    return -np.inf if bound is None or np.isnan(bound) else bound
+
+
+def max_flow_lp(data, options=None, timer=None):
+    '''
+    Max flow LP (max_flow.py): maximize the flow entering the terminal, subject to
+    capacities and flow conservation at the other nodes (but the source).
+    Return (max flow value, flows on the arcs in the order of data['A'])
+    '''
+    with _phase(timer, 'instance_creation'):
+        arcs, tails, heads, capacity, cost = _arc_arrays(data)
+        n, m = data['n'][None], len(arcs)
+        s, t = data['s'][None] - 1, data['t'][None] - 1
+        c = -(heads == t).astype(np.float64)
+        #node-arc incidence matrix: +1 on the tail (outflow), -1 on the head (inflow)
+        incidence = sparse.csr_matrix((np.concatenate([np.ones(m), -np.ones(m)]),
+                                       (np.concatenate([tails, heads]), np.concatenate([np.arange(m), np.arange(m)]))),
+                                      shape=(n, m))
+        used = np.zeros(n, dtype=bool)
+        used[tails] = True
+        used[heads] = True
+        used[[s, t]] = False
+        constraints = []
+        if used.any():
+            constraints.append(LinearConstraint(incidence[np.flatnonzero(used)], 0, 0))
+    with _phase(timer, 'optimality_solve'):
+        result = _solve(c, np.zeros(m), Bounds(np.zeros(m), capacity), constraints, options)
+    return -result.fun, result.x
+
+
+class AttackMILP:
+    '''
+    Worst-case attack MILP (optimality_robust.py), variables [alpha (n), beta (m), z (m)]:
+    minimize the capacity of the cut (beta) left after destroying the arcs z, with
+    the destruction cost of each arc increased by its fortification y, within the
+    budget gamma. The arc constraints are built once, the budget row at each solve.
+    '''
+
+    def __init__(self, data, options=None, timer=None):
+        self.timer = timer
+        self.options = options
+        with _phase(timer, 'instance_creation'):
+            self.arcs, tails, heads, self.capacity, self.cost = _arc_arrays(data)
+            self.n, self.m = data['n'][None], len(self.arcs)
+            n, m = self.n, self.m
+            self.c = np.concatenate([np.zeros(n), self.capacity, np.zeros(m)])
+            #alpha_i - alpha_j + beta_ij + z_ij >= 0
+            rows = np.tile(np.arange(m), 4)
+            cols = np.concatenate([tails, heads, n + np.arange(m), n + m + np.arange(m)])
+            values = np.concatenate([np.ones(m), -np.ones(m), np.ones(m), np.ones(m)])
+            self.arc_constraints = LinearConstraint(sparse.csr_matrix((values, (rows, cols)), shape=(m, n + 2 * m)), 0, np.inf)
+            lower = np.zeros(n + 2 * m)
+            upper = np.ones(n + 2 * m)
+            upper[data['s'][None] - 1] = 0 #source on the attacker side
+            lower[data['t'][None] - 1] = 1 #terminal on the other side
+            self.bounds = Bounds(lower, upper)
+            self.extra = [] #upper bounds on the objective
+            self.y = np.zeros(m)
+        self.bound = None
+
+    def add_upper_bound(self, value):
+        '''
+        Add the constraint objective <= {value}
+        '''
+        self.extra.append(LinearConstraint(self.c[np.newaxis, :], -np.inf, value))
+
+    def set_start(self, side, cut, destroyed):
+        #scipy.optimize.milp does not take a starting solution
+        pass
+
+    def solve(self, gamma, y=None, time_limit=None):
+        '''
+        Solve with attacker budget {gamma} and fortification {y} (array in the order
+        of the arcs, None to keep the previous one), within {time_limit} seconds if
+        given. Return (objective, z array), the lower bound proved on the objective
+        is kept in bound.
+        '''
+        if y is not None:
+            self.y = np.asarray(y, dtype=np.float64)
+        n, m = self.n, self.m
+        budget = np.zeros((1, n + 2 * m))
+        budget[0, n + m:] = self.cost + self.y
+        constraints = [self.arc_constraints, LinearConstraint(budget, -np.inf, gamma)] + self.extra
+        with _phase(self.timer, 'optimality_solve'):
+            result = _solve(self.c, np.ones(n + 2 * m), self.bounds, constraints, self.options, time_limit)
+        self.bound = _bound(result)
+        return result.fun, np.round(result.x[n + m:]).astype(int)
+
+    def size(self):
+        #(variables, constraints): arc constraints, budget row and upper bounds on the objective
+        return self.n + 2 * self.m, self.m + 1 + len(self.extra)
+
+
+class FortificationLP:
+    '''
+    Fortification LP (feasibility_robust.py), variables [y (m), tobj]: maximize tobj,
+    the smallest cost of the attacks found so far (one cut per attack) after
+    fortification, with at most F units of fortification. Only the arcs that
+    appeared in an attack can be fortified.
+    '''
+
+    def __init__(self, data, F, options=None, timer=None):
+        self.timer = timer
+        self.options = options
+        self.F = F
+        with _phase(timer, 'instance_creation'):
+            self.arcs, tails, heads, self.capacity, self.cost = _arc_arrays(data)
+            self.m = len(self.arcs)
+            self.c = np.zeros(self.m + 1)
+            self.c[-1] = -1
+            self.budget = LinearConstraint(np.concatenate([np.ones(self.m), [0]])[np.newaxis, :], -np.inf, F)
+            self.cut_rows = []
+            self.cut_bounds = []
+            self.allowed = np.zeros(self.m, dtype=bool)
+        self.bound = None
+
+    def add_cut(self, z):
+        '''
+        Add the cut of the attack {z}: sum over the destroyed arcs of (y + cost) >= tobj
+        '''
+        with _phase(self.timer, 'cut_construction'):
+            destroyed = np.flatnonzero(np.asarray(z) > 0.5)
+            self.cut_rows.append(destroyed)
+            self.cut_bounds.append(-self.cost[destroyed].sum())
+            self.allowed[destroyed] = True
+
+    def solve(self, time_limit=None):
+        '''
+        Solve within {time_limit} seconds if given, return (tobj, y array). The upper
+        bound proved on tobj is kept in bound.
+        '''
+        m = self.m
+        with _phase(self.timer, 'cut_construction'):
+            rows = np.concatenate([np.full(len(r), k) for k, r in enumerate(self.cut_rows)] + [np.arange(len(self.cut_rows))])
+            cols = np.concatenate(self.cut_rows + [np.full(len(self.cut_rows), m)])
+            values = np.concatenate([np.ones(sum(len(r) for r in self.cut_rows)), -np.ones(len(self.cut_rows))])
+            cuts = LinearConstraint(sparse.csr_matrix((values, (rows, cols)), shape=(len(self.cut_rows), m + 1)),
+                                    np.array(self.cut_bounds), np.inf)
+            upper = np.where(self.allowed, np.inf, 0.0) if self.cut_rows else np.full(m, self.F)
+            bounds = Bounds(np.concatenate([np.zeros(m), [-np.inf]]), np.concatenate([upper, [np.inf]]))
+        with _phase(self.timer, 'feasibility_solve'):
+            result = _solve(self.c, np.zeros(m + 1), bounds, [self.budget, cuts], self.options, time_limit)
+        self.bound = -_bound(result)
+        return -result.fun, result.x[:m]
+
+    def size(self):
+        #(variables, constraints): budget row and one cut per attack
+        return self.m + 1, 1 + len(self.cut_rows)
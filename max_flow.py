@@ -24,8 +24,26 @@ model.z = Param(model.A, default=0, mutable=True) #destruction cost
 model.f = Var(model.A, domain=NonNegativeReals) #flow on each arc
 
 
+#adjacency of each vertex, built with a single pass over the arcs
+def out_nodes_init(model):
+    out_nodes = {i: [] for i in model.V}
+    for (i,j) in model.A:
+        out_nodes[i].append(j)
+    return out_nodes
+
+def in_nodes_init(model):
+    in_nodes = {j: [] for j in model.V}
+    for (i,j) in model.A:
+        in_nodes[j].append(i)
+    return in_nodes
+
+model.out_nodes = Set(model.V, within=model.V, initialize=out_nodes_init) #j such that (i,j) in A
+model.in_nodes = Set(model.V, within=model.V, initialize=in_nodes_init) #i such that (i,j) in A
+
+
 def obj_expression(model):
-    return sum(model.f[i,j] for (i,j) in model.A if j==value(model.t))
+    t = value(model.t)
+    return sum(model.f[i,t] for i in model.in_nodes[t])
 
 
 model.OBJ = Objective(rule=obj_expression, sense=maximize)
@@ -38,8 +56,8 @@ model.constraint_capacity_bound = Constraint(model.A, rule=constraint_capacity_b
 
 
 def constraint_flow_conservation_rule(model,i):
-    if (i != value(model.s) and i!= value(model.t)):
-        return sum(model.f[k,j] for (k,j) in model.A  if k == i) == sum(model.f[k,j] for (k,j) in model.A if j == i)
+    if (i != value(model.s) and i!= value(model.t)) and (len(model.out_nodes[i]) > 0 or len(model.in_nodes[i]) > 0):
+        return sum(model.f[i,j] for j in model.out_nodes[i]) == sum(model.f[k,i] for k in model.in_nodes[i])
     else:
         no_constraint = pyomo.environ.Constraint.Skip
         return no_constraint
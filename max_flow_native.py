@@ -0,0 +1,261 @@
+'''author__ = 'Alberto Costa'
+   mail = 'noobsajbot@gmail.com'
+   date = '18 Oct 2026'
+
+native max flow engine (Dinic) working directly on the NIRAD data dictionary,
+without building a Pyomo instance or calling an external solver
+'''
+
+from collections import deque
+
+
+EPS = 1e-9 #residual capacities below this value are considered saturated
+
+
+class FlowNetwork:
+    '''
+    Residual network stored in compact arrays: arc k of the input is the edge 2k,
+    its reverse (residual) edge is 2k+1. Outgoing edges of each node are stored
+    contiguously (CSR layout) in adj_edges[adj_start[v]:adj_start[v+1]].
+    '''
+
+    def __init__(self, arcs, capacity, source, terminal):
+        self.arcs = list(arcs)
+        self.source = source
+        self.terminal = terminal
+        self.index = {} #node id -> compact node index
+        for (i, j) in self.arcs:
+            if i not in self.index:
+                self.index[i] = len(self.index)
+            if j not in self.index:
+                self.index[j] = len(self.index)
+        for v in (source, terminal):
+            if v not in self.index:
+                self.index[v] = len(self.index)
+        self.s = self.index[source]
+        self.t = self.index[terminal]
+        n_nodes = len(self.index)
+
+        m = len(self.arcs)
+        self.head = [0] * (2 * m)
+        self.cap = [0.0] * (2 * m) #residual capacities
+        self.capacity = [0.0] * m #capacities of the original arcs
+        degree = [0] * (n_nodes + 1)
+        for k, (i, j) in enumerate(self.arcs):
+            u, v = self.index[i], self.index[j]
+            c = float(capacity[(i, j)])
+            self.capacity[k] = c
+            self.head[2 * k] = v
+            self.head[2 * k + 1] = u
+            self.cap[2 * k] = c
+            degree[u + 1] += 1
+            degree[v + 1] += 1
+
+        #counting sort of the edges by tail node
+        for v in range(n_nodes):
+            degree[v + 1] += degree[v]
+        self.adj_start = degree[:]
+        self.adj_edges = [0] * (2 * m)
+        fill = degree[:-1]
+        for e in range(2 * m):
+            u = self.head[e ^ 1]
+            self.adj_edges[fill[u]] = e
+            fill[u] += 1
+
+        self.value = 0.0
+        self.blocking_flows = 0 #blocking flows pushed since the network was built
+
+    def _bfs(self, level):
+        head, cap, adj_start, adj_edges = self.head, self.cap, self.adj_start, self.adj_edges
+        for v in range(len(level)):
+            level[v] = -1
+        level[self.s] = 0
+        queue = deque([self.s])
+        while queue:
+            u = queue.popleft()
+            for p in range(adj_start[u], adj_start[u + 1]):
+                e = adj_edges[p]
+                v = head[e]
+                if level[v] < 0 and cap[e] > EPS:
+                    level[v] = level[u] + 1
+                    queue.append(v)
+        return level[self.t] >= 0
+
+    def _blocking_flow(self, level):
+        head, cap, adj_start, adj_edges = self.head, self.cap, self.adj_start, self.adj_edges
+        s, t = self.s, self.t
+        current = adj_start[:-1] #current-arc pointers
+        total = 0.0
+        path = []
+        u = s
+        while True:
+            if u == t:
+                push = min(cap[e] for e in path)
+                saturated = len(path)
+                for k, e in enumerate(path):
+                    cap[e] -= push
+                    cap[e ^ 1] += push
+                    if cap[e] <= EPS and k < saturated:
+                        saturated = k
+                total += push
+                #restart from the tail of the first saturated edge
+                del path[saturated:]
+                u = head[path[-1]] if path else s
+                continue
+
+            end = adj_start[u + 1]
+            p = current[u]
+            while p < end:
+                e = adj_edges[p]
+                if cap[e] > EPS and level[head[e]] == level[u] + 1:
+                    break
+                p += 1
+            current[u] = p
+            if p < end:
+                e = adj_edges[p]
+                path.append(e)
+                u = head[e]
+            else:
+                #dead end: remove u from the level graph and retreat
+                level[u] = -1
+                if not path:
+                    return total
+                e = path.pop()
+                u = head[e ^ 1]
+                current[u] += 1
+
+    def solve(self):
+        '''
+        Augment the current flow until it is maximum, return the max flow value
+        '''
+        if self.s == self.t:
+            return self.value
+        level = [-1] * len(self.index)
+        while self._bfs(level):
+            self.value += self._blocking_flow(level)
+            self.blocking_flows += 1
+        return self.value
+
+    def _augment_paths(self, src, dst, amount):
+        '''
+        Push up to {amount} units from {src} to {dst} along shortest residual
+        paths, return the amount pushed
+        '''
+        head, cap, adj_start, adj_edges = self.head, self.cap, self.adj_start, self.adj_edges
+        pushed = 0.0
+        while amount - pushed > EPS:
+            parent = {src: -1} #node -> edge used to reach it
+            queue = deque([src])
+            while queue and dst not in parent:
+                u = queue.popleft()
+                for p in range(adj_start[u], adj_start[u + 1]):
+                    e = adj_edges[p]
+                    v = head[e]
+                    if v not in parent and cap[e] > EPS:
+                        parent[v] = e
+                        queue.append(v)
+            if dst not in parent:
+                break
+            path = []
+            v = dst
+            while v != src:
+                e = parent[v]
+                path.append(e)
+                v = head[e ^ 1]
+            push = min(amount - pushed, min(cap[e] for e in path))
+            for e in path:
+                cap[e] -= push
+                cap[e ^ 1] += push
+            pushed += push
+        return pushed
+
+    def _source_outflow(self):
+        outflow = 0.0
+        for p in range(self.adj_start[self.s], self.adj_start[self.s + 1]):
+            e = self.adj_edges[p]
+            if e % 2 == 0:
+                outflow += self.capacity[e // 2] - self.cap[e]
+            else:
+                outflow -= self.cap[e]
+        return outflow
+
+    def _set_capacity(self, k, capacity):
+        e = 2 * k
+        flow = self.capacity[k] - self.cap[e]
+        self.capacity[k] = capacity
+        if flow <= capacity:
+            self.cap[e] = capacity - flow
+            return
+        #the arc (u,v) carries too much flow: keep {capacity}, then reroute the
+        #excess from u to v, or send it back from u and pull it back to v
+        u, v = self.head[e + 1], self.head[e]
+        self.cap[e] = 0.0
+        self.cap[e + 1] = capacity
+        excess = flow - capacity
+        excess -= self._augment_paths(u, v, excess)
+        if excess <= EPS:
+            return
+        #source and terminal do not need to be balanced
+        if u != self.s and u != self.t:
+            surplus = excess - self._augment_paths(u, self.s, excess)
+            if surplus > EPS:
+                self._augment_paths(u, self.t, surplus)
+        if v != self.s and v != self.t:
+            deficit = excess - self._augment_paths(self.t, v, excess)
+            if deficit > EPS:
+                self._augment_paths(self.s, v, deficit)
+
+    def update_capacities(self, changes):
+        '''
+        Change the capacity of some arcs, {changes} being a list of (position of
+        the arc in arcs, new capacity), then repair the current flow and augment
+        it to a maximum flow. The work depends on the flow that has to be rerouted,
+        not on the size of the network. Return the new max flow value.
+        '''
+        for k, capacity in changes:
+            self._set_capacity(k, float(capacity))
+        self.value = self._source_outflow()
+        return self.solve()
+
+    def source_side(self):
+        '''
+        Ids of the nodes reachable from the source in the residual network
+        '''
+        head, cap, adj_start, adj_edges = self.head, self.cap, self.adj_start, self.adj_edges
+        reached = [False] * len(self.index)
+        reached[self.s] = True
+        queue = deque([self.s])
+        while queue:
+            u = queue.popleft()
+            for p in range(adj_start[u], adj_start[u + 1]):
+                e = adj_edges[p]
+                v = head[e]
+                if not reached[v] and cap[e] > EPS:
+                    reached[v] = True
+                    queue.append(v)
+        return {node for node, u in self.index.items() if reached[u]}
+
+    def min_cut(self):
+        '''
+        Return (source side, arcs of the cut): with a maximum flow, the arcs from the
+        nodes reachable from the source in the residual network to the other nodes
+        form a minimum s-t cut
+        '''
+        side = self.source_side()
+        return side, [(i, j) for (i, j) in self.arcs if i in side and j not in side]
+
+    def flows(self):
+        '''
+        Return the list of flows on the original arcs, in input order
+        '''
+        return [self.capacity[k] - self.cap[2 * k] for k in range(len(self.arcs))]
+
+
+def max_flow(data):
+    '''
+    Compute the max flow from the NIRAD data dictionary (same format used to
+    create the Pyomo instances), return the FlowNetwork with the optimal flow
+    '''
+    network = FlowNetwork(data['A'][None], data['capacity'], data['s'][None], data['t'][None])
+    network.solve()
+    return network
@@ -0,0 +1,136 @@
+'''author__ = 'Alberto Costa'
+   mail = 'noobsajbot@gmail.com'
+   date = '18 Oct 2026'
+
+   seeded generators of synthetic networks, in the data dictionary format of generate_input_data
+'''
+
+import math
+import random
+
+
+def _data(n, arcs, source, terminal, rng, max_capacity, max_cost):
+    #random capacities (integers) and destruction costs (one decimal) for the arcs
+    arcs = list(dict.fromkeys(arc for arc in arcs if arc[0] != arc[1]))
+    capacity = {arc: rng.randint(1, max_capacity) for arc in arcs}
+    cost = {arc: round(rng.uniform(0.5, max_cost), 1) for arc in arcs}
+    return {
+        'n': {None: n},
+        's': {None: source},
+        't': {None: terminal},
+        'A': {None: arcs},
+        'capacity': capacity,
+        'cost': cost,
+        }
+
+
+def grid(rows, cols, seed=0, max_capacity=10, max_cost=5):
+    '''
+    {rows}x{cols} grid, nodes numbered by row, arcs towards the right and
+    downwards plus, with probability 0.3, the opposite arc. Source in the top left
+    corner, terminal in the bottom right corner.
+    '''
+    rng = random.Random(seed)
+    node = lambda r, c: r * cols + c + 1
+    arcs = []
+    for r in range(rows):
+        for c in range(cols):
+            for (r2, c2) in ((r, c + 1), (r + 1, c)):
+                if r2 < rows and c2 < cols:
+                    arcs.append((node(r, c), node(r2, c2)))
+                    if rng.random() < 0.3:
+                        arcs.append((node(r2, c2), node(r, c)))
+    return _data(rows * cols, arcs, 1, rows * cols, rng, max_capacity, max_cost)
+
+
+def layered_dag(layers, width, degree=3, seed=0, max_capacity=10, max_cost=5):
+    '''
+    Source, {layers} layers of {width} nodes and terminal. Every node is linked to
+    {degree} random nodes of the next layer, the source to the whole first layer
+    and the whole last layer to the terminal.
+    '''
+    rng = random.Random(seed)
+    n = layers * width + 2
+    layer = lambda k: range(2 + k * width, 2 + (k + 1) * width)
+    arcs = [(1, j) for j in layer(0)]
+    for k in range(layers - 1):
+        following = list(layer(k + 1))
+        for i in layer(k):
+            arcs.extend((i, j) for j in rng.sample(following, min(degree, width)))
+    arcs.extend((i, n) for i in layer(layers - 1))
+    return _data(n, arcs, 1, n, rng, max_capacity, max_cost)
+
+
+def random_geometric(n, radius=None, seed=0, max_capacity=10, max_cost=5):
+    '''
+    {n} random points in the unit square, linked in both directions when closer
+    than {radius} (by default, about twice the connectivity threshold). The source
+    is the leftmost point, the terminal the rightmost one.
+    '''
+    rng = random.Random(seed)
+    if radius is None:
+        radius = 2 * math.sqrt(math.log(n) / (math.pi * n))
+    points = sorted((rng.random(), rng.random()) for _ in range(n)) #node k+1 is points[k]
+    arcs = []
+    for a in range(n):
+        xa, ya = points[a]
+        for b in range(a + 1, n):
+            xb, yb = points[b]
+            if xb - xa > radius:
+                break
+            if (xb - xa) ** 2 + (yb - ya) ** 2 <= radius ** 2:
+                arcs.append((a + 1, b + 1))
+                arcs.append((b + 1, a + 1))
+    return _data(n, arcs, 1, n, rng, max_capacity, max_cost)
+
+
+def scale_free(n, m=2, seed=0, max_capacity=10, max_cost=5):
+    '''
+    Barabasi-Albert network: each new node is linked (in both directions) to {m}
+    existing nodes chosen with probability proportional to their degree. The
+    source is the first node, the terminal the last one.
+    '''
+    rng = random.Random(seed)
+    arcs = []
+    targets = list(range(1, m + 2)) #initial clique of m+1 nodes
+    for i in targets:
+        for j in targets:
+            if i < j:
+                arcs.append((i, j))
+                arcs.append((j, i))
+    ends = [v for arc in arcs for v in arc] #nodes repeated by degree
+    for v in range(m + 2, n + 1):
+        chosen = set()
+        while len(chosen) < m:
+            chosen.add(rng.choice(ends))
+        for u in chosen:
+            arcs.append((u, v))
+            arcs.append((v, u))
+            ends.extend((u, v))
+    return _data(n, arcs, 1, n, rng, max_capacity, max_cost)
+
+
+generators = {
+    'grid': grid,
+    'layered_dag': layered_dag,
+    'random_geometric': random_geometric,
+    'scale_free': scale_free,
+    }
+
+
+def write_network(data, output_file):
+    '''
+    Write {data} in the input format of NIRAD (rows "node_i node_j capacity cost"),
+    with an arc leaving the source first and an arc entering the terminal last,
+    since the source and the terminal are taken from the first and the last row
+    '''
+    s, t = data['s'][None], data['t'][None]
+    arcs = data['A'][None]
+    first = [arc for arc in arcs if arc[0] == s][:1]
+    last = [arc for arc in arcs if arc[1] == t and arc not in first][-1:]
+    if not first or not last:
+        raise ValueError('the source needs a leaving arc and the terminal an entering arc')
+    ordered = first + [arc for arc in arcs if arc not in first and arc not in last] + last
+    with open(output_file, 'w') as f:
+        for (i, j) in ordered:
+            f.write(f"{i} {j} {data['capacity'][(i, j)]} {data['cost'][(i, j)]}\n")
@@ -0,0 +1,216 @@
+'''author__ = 'Alberto Costa'
+   mail = 'noobsajbot@gmail.com'
+   date = '18 Oct 2026'
+
+   reduction of the network before building the Pyomo instances
+'''
+
+from collections import deque
+
+
+def _reach(start, neighbours, stop):
+    '''
+    Nodes reachable from {start}, without expanding {stop}
+    '''
+    reached = {start}
+    queue = deque([start])
+    while queue:
+        u = queue.popleft()
+        if u == stop:
+            continue
+        for v in neighbours.get(u, ()):
+            if v not in reached:
+                reached.add(v)
+                queue.append(v)
+    return reached
+
+
+def _children(part, kind):
+    #flatten nested series (parallel) parts
+    return list(part[1]) if part[0] == kind else [part]
+
+
+class ReducedNetwork:
+    '''
+    Reduced copy of a data dictionary (as generated by generate_input_data):
+        - if {prune} is True, the arcs that are not on any source-terminal path
+          (dead ends, arcs entering the source or leaving the terminal) are removed
+        - if {series} is True, a node (other than source and terminal) with one
+          entering and one leaving arc is removed and its two arcs are replaced
+          by one arc with the smallest capacity and the smallest cost
+        - if {parallel} is True, a new arc parallel to an existing one is merged
+          with it, adding the capacities
+        - the nodes left are renumbered 1..k (k nodes), so that the vertex sets
+          RangeSet(1, n) of the models only contain actual nodes, whatever the ids
+          of the input file
+    The pruning is valid for all the models, series chains for the max flow and the
+    worst-case attack (not for the fortification, which has to cover every arc of the
+    chain), parallel arcs for the max flow only.
+
+    {data} is the reduced data dictionary, {parts} maps each reduced arc to the
+    original arcs it stands for: ('arc', (i,j)), ('series', [parts]) or ('parallel', [parts]),
+    {node_ids} gives the original id of the nodes (node k is node_ids[k-1]).
+    The reduced network has no arcs if no flow can reach the terminal.
+    '''
+
+    def __init__(self, data, prune=True, series=False, parallel=False):
+        self.original = data
+        s, t = data['s'][None], data['t'][None]
+        arcs = data['A'][None]
+        capacity, cost = data['capacity'], data['cost']
+
+        if prune:
+            successors = dict()
+            predecessors = dict()
+            for (i, j) in arcs:
+                successors.setdefault(i, []).append(j)
+                predecessors.setdefault(j, []).append(i)
+            from_source = _reach(s, successors, t)
+            to_terminal = _reach(t, predecessors, s)
+            live = [(i, j) for (i, j) in arcs if i in from_source and j in to_terminal and j != s and i != t]
+        else:
+            live = list(arcs)
+
+        self.parts = {arc: ('arc', arc) for arc in live}
+        self.capacity = {arc: capacity[arc] for arc in live}
+        self.cost = {arc: cost[arc] for arc in live}
+        if series:
+            self._contract_series(s, t, parallel)
+        self._compact_nodes(s, t)
+
+        self.data = dict(data)
+        self.data['n'] = {None: len(self.node_ids)}
+        self.data['s'] = {None: self.node_index[s]}
+        self.data['t'] = {None: self.node_index[t]}
+        self.data['A'] = {None: list(self.parts)}
+        self.data['capacity'] = self.capacity
+        self.data['cost'] = self.cost
+
+    def _compact_nodes(self, s, t):
+        nodes = {s, t}
+        for (i, j) in self.parts:
+            nodes.add(i)
+            nodes.add(j)
+        self.node_ids = sorted(nodes)
+        self.node_index = {v: k + 1 for k, v in enumerate(self.node_ids)}
+        index = self.node_index
+        self.parts = {(index[i], index[j]): part for (i, j), part in self.parts.items()}
+        self.capacity = {(index[i], index[j]): value for (i, j), value in self.capacity.items()}
+        self.cost = {(index[i], index[j]): value for (i, j), value in self.cost.items()}
+
+    def _contract_series(self, s, t, parallel):
+        parts, capacity, cost = self.parts, self.capacity, self.cost
+        in_arcs = dict()
+        out_arcs = dict()
+        for (i, j) in parts:
+            out_arcs.setdefault(i, set()).add(j)
+            in_arcs.setdefault(j, set()).add(i)
+
+        candidates = deque(v for v in in_arcs if v != s and v != t)
+        while candidates:
+            v = candidates.popleft()
+            if v == s or v == t or len(in_arcs.get(v, ())) != 1 or len(out_arcs.get(v, ())) != 1:
+                continue
+            u = next(iter(in_arcs[v]))
+            w = next(iter(out_arcs[v]))
+            if u == w:
+                continue
+            merge = (u, w) in parts
+            if merge and not parallel:
+                continue
+
+            a, b = (u, v), (v, w)
+            part = ('series', _children(parts.pop(a), 'series') + _children(parts.pop(b), 'series'))
+            chain_capacity = min(capacity.pop(a), capacity.pop(b))
+            chain_cost = min(cost.pop(a), cost.pop(b))
+            out_arcs[u].discard(v)
+            in_arcs[v].discard(u)
+            out_arcs[v].discard(w)
+            in_arcs[w].discard(v)
+
+            if merge:
+                parts[(u, w)] = ('parallel', _children(parts[(u, w)], 'parallel') + [part])
+                capacity[(u, w)] += chain_capacity
+                cost[(u, w)] += chain_cost
+            else:
+                parts[(u, w)] = part
+                capacity[(u, w)] = chain_capacity
+                cost[(u, w)] = chain_cost
+                out_arcs[u].add(w)
+                in_arcs[w].add(u)
+            candidates.extend((u, w))
+
+    def __len__(self):
+        return len(self.parts)
+
+    def _part_capacity(self, part):
+        kind, body = part
+        if kind == 'arc':
+            return self.original['capacity'][body]
+        values = [self._part_capacity(p) for p in body]
+        return min(values) if kind == 'series' else sum(values)
+
+    def _part_cost(self, part):
+        kind, body = part
+        if kind == 'arc':
+            return self.original['cost'][body]
+        values = [self._part_cost(p) for p in body]
+        return min(values) if kind == 'series' else sum(values)
+
+    def _spread(self, part, flow, flows):
+        kind, body = part
+        if kind == 'arc':
+            flows[body] = flow
+        elif kind == 'series':
+            for p in body:
+                self._spread(p, flow, flows)
+        else:
+            #fill the parallel branches one after the other
+            for p in body:
+                branch = min(flow, self._part_capacity(p))
+                self._spread(p, branch, flows)
+                flow -= branch
+
+    def _destroy(self, part, destroyed):
+        kind, body = part
+        if kind == 'arc':
+            destroyed.append(body)
+        elif kind == 'series':
+            #destroying the cheapest arc cuts the chain
+            self._destroy(min(body, key=self._part_cost), destroyed)
+        else:
+            for p in body:
+                self._destroy(p, destroyed)
+
+    def flows_back(self, flows):
+        '''
+        Flows on the original arcs from the flows {flows} (reduced arc -> flow) on
+        the reduced network, only the non-zero flows are returned
+        '''
+        original = dict()
+        for arc, flow in flows.items():
+            self._spread(self.parts[arc], flow, original)
+        return {arc: flow for arc, flow in original.items() if flow > 0}
+
+    def nodes_back(self, nodes):
+        '''
+        Original ids of the reduced nodes {nodes}
+        '''
+        return [self.node_ids[v - 1] for v in nodes]
+
+    def values_back(self, values):
+        '''
+        Values on the original arcs from {values} (reduced arc -> value) on arcs
+        that were not contracted
+        '''
+        return {self.parts[arc][1]: value for arc, value in values.items()}
+
+    def arcs_back(self, arcs):
+        '''
+        Original arcs to destroy for the attack destroying the reduced arcs {arcs}
+        '''
+        destroyed = []
+        for arc in arcs:
+            self._destroy(self.parts[arc], destroyed)
+        return destroyed
+
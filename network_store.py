@@ -0,0 +1,226 @@
+'''author__ = 'Alberto Costa'
+   mail = 'noobsajbot@gmail.com'
+   date = '18 Oct 2026'
+
+   columnar, arc-indexed storage of the network
+'''
+
+import copy
+import json
+import os
+import numpy as np
+from lazy_module import LazyModule
+
+
+pd = LazyModule('pandas') #only imported when a file is parsed or a table is built
+
+
+class NetworkStore:
+    '''
+    Network stored by columns: row k is the oriented arc (node_i[k], node_j[k])
+    with capacity capacity[k] and destruction cost cost[k]. {index} maps an arc
+    (i,j) to its row.
+
+    The arrays given to the constructor are the baseline and are never modified:
+    the changes are kept in a sparse overlay (row -> new value) per column, so that
+    several views can share one baseline and a reset only drops the edits.
+    '''
+
+    columns = ['node i', 'node j', 'capacity', 'cost']
+
+    def __init__(self, node_i, node_j, capacity, cost):
+        self.node_i = np.asarray(node_i)
+        self.node_j = np.asarray(node_j)
+        self.base_capacity = np.asarray(capacity, dtype=np.float64)
+        self.base_cost = np.asarray(cost, dtype=np.float64)
+        for array in (self.node_i, self.node_j, self.base_capacity, self.base_cost):
+            array.flags.writeable = False
+        self.arcs = list(zip(self.node_i.tolist(), self.node_j.tolist()))
+        #built in reverse order so that duplicated arcs map to their first row
+        self.index = dict(zip(reversed(self.arcs), range(len(self.arcs) - 1, -1, -1)))
+        self.capacity_edits = dict()
+        self.cost_edits = dict()
+
+    @classmethod
+    def from_frame(cls, frame):
+        return cls(frame['node i'].to_numpy(copy=True), frame['node j'].to_numpy(copy=True),
+                   frame['capacity'].to_numpy(dtype=np.float64, copy=True), frame['cost'].to_numpy(dtype=np.float64, copy=True))
+
+    def __len__(self):
+        return len(self.arcs)
+
+    def view(self):
+        '''
+        New store sharing the baseline (arrays, arcs and index) of this one, with a
+        copy of its edits. O(number of edits).
+        '''
+        other = copy.copy(self)
+        other.capacity_edits = dict(self.capacity_edits)
+        other.cost_edits = dict(self.cost_edits)
+        return other
+
+    def reset(self):
+        '''
+        Go back to the baseline, O(number of edits)
+        '''
+        self.capacity_edits.clear()
+        self.cost_edits.clear()
+
+    @staticmethod
+    def _apply(base, edits):
+        if not edits:
+            return base
+        values = base.copy()
+        values[np.fromiter(edits.keys(), dtype=np.int64, count=len(edits))] = np.fromiter(edits.values(), dtype=np.float64, count=len(edits))
+        return values
+
+    @property
+    def capacity(self):
+        '''
+        Current capacities (read-only if there are no edits), use update to change them
+        '''
+        return self._apply(self.base_capacity, self.capacity_edits)
+
+    @property
+    def cost(self):
+        '''
+        Current costs (read-only if there are no edits), use update to change them
+        '''
+        return self._apply(self.base_cost, self.cost_edits)
+
+    def row(self, arc):
+        '''
+        Row of the arc (i,j), None if the arc does not exist
+        '''
+        return self.index.get(tuple(arc))
+
+    def rows(self, arcs):
+        '''
+        Rows of a list of arcs, -1 for the arcs that do not exist
+        '''
+        index = self.index
+        return np.fromiter((index.get(tuple(arc), -1) for arc in arcs), dtype=np.int64, count=len(arcs))
+
+    def update(self, arcs, capacity=None, cost=None):
+        '''
+        Set the capacity and/or the cost of a batch of arcs in the overlay, with
+        the arcs resolved in one pass. Arcs that do not exist and negative values
+        are ignored.
+        '''
+        rows = self.rows(arcs)
+        for edits, values in ((self.capacity_edits, capacity), (self.cost_edits, cost)):
+            if values is None:
+                continue
+            values = np.asarray(values, dtype=np.float64)
+            valid = (rows >= 0) & (values >= 0)
+            edits.update(zip(rows[valid].tolist(), values[valid].tolist()))
+
+    def to_frame(self):
+        return pd.DataFrame({'node i': self.node_i, 'node j': self.node_j,
+                             'capacity': self.capacity, 'cost': self.cost}, columns=self.columns)
+
+    def data_dict(self, nodes, source, terminal):
+        '''
+        Data dictionary in the format used to create the Pyomo instances
+        '''
+        arcs = list(self.arcs)
+        capacity = dict(zip(arcs, self.base_capacity.tolist()))
+        cost = dict(zip(arcs, self.base_cost.tolist()))
+        for row, value in self.capacity_edits.items():
+            capacity[arcs[row]] = value
+        for row, value in self.cost_edits.items():
+            cost[arcs[row]] = value
+        return {
+            'n': {None: int(nodes)},
+            's': {None: int(source)},
+            't': {None: int(terminal)},
+            'A': {None: arcs},
+            'capacity': capacity,
+            'cost': cost,
+            }
+
+
+def _node_dtype(max_id):
+    return np.int32 if max_id <= np.iinfo(np.int32).max else np.int64
+
+
+def _read_binary_cache(cache_dir, path, stat):
+    '''
+    Load the arrays of a parsed file memory-mapped (read-only, the changes go to
+    the overlay of the store), None if the cache does not exist, belongs to another
+    file or is older than the file
+    '''
+    try:
+        with open(os.path.join(cache_dir, 'meta.json')) as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if meta.get('path') != path or meta.get('size') != stat.st_size or meta.get('mtime_ns') != stat.st_mtime_ns:
+        return None
+    arrays = [np.load(os.path.join(cache_dir, name + '.npy'), mmap_mode='r') for name in ('node_i', 'node_j', 'capacity', 'cost')]
+    return arrays, meta['nodes'], meta['source'], meta['terminal']
+
+
+def _write_binary_cache(cache_dir, path, stat, arrays, nodes, source, terminal):
+    os.makedirs(cache_dir, exist_ok=True)
+    for name, array in zip(('node_i', 'node_j', 'capacity', 'cost'), arrays):
+        np.save(os.path.join(cache_dir, name + '.npy'), array)
+    meta = {'path': path, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'nodes': nodes, 'source': source, 'terminal': terminal}
+    with open(os.path.join(cache_dir, 'meta.json'), 'w') as f:
+        json.dump(meta, f)
+
+
+def load_network(input_file, chunk_rows=1000000, cache_dir=None):
+    '''
+    Read an edge list file (rows "node_i node_j capacity cost") in chunks of
+    {chunk_rows} rows into typed arrays (int32 node ids when they fit).
+    The number of nodes (max node id), the source (first node of the file) and the
+    terminal (last node of the file) are computed in the same pass.
+    If {cache_dir} is given, the parsed arrays are saved there in binary format and
+    memory-mapped by the next loads of the same (unchanged) file.
+
+    Return [network_data, nodes, source, terminal], network_data being a NetworkStore
+    '''
+    path = os.path.abspath(input_file)
+    stat = os.stat(input_file)
+    if cache_dir is not None:
+        cached = _read_binary_cache(cache_dir, path, stat)
+        if cached is not None:
+            arrays, nodes, source, terminal = cached
+            return [NetworkStore(*arrays), nodes, source, terminal]
+
+    chunks = {name: [] for name in ('node_i', 'node_j', 'capacity', 'cost')}
+    source = None
+    terminal = None
+    nodes = 0
+    reader = pd.read_csv(input_file, header=None, sep=" ", names=NetworkStore.columns,
+                         dtype={'node i': np.int64, 'node j': np.int64, 'capacity': np.float64, 'cost': np.float64},
+                         chunksize=chunk_rows)
+    for chunk in reader:
+        if len(chunk) == 0:
+            continue
+        node_i = chunk['node i'].to_numpy()
+        node_j = chunk['node j'].to_numpy()
+        if source is None:
+            source = int(node_i[0]) #first node
+        terminal = int(node_j[-1]) #last node read so far
+        nodes = max(nodes, int(node_i.max()), int(node_j.max()))
+        #keep the smallest dtype for the ids, the full table is never held in memory
+        chunks['node_i'].append(node_i.astype(_node_dtype(nodes)))
+        chunks['node_j'].append(node_j.astype(_node_dtype(nodes)))
+        chunks['capacity'].append(chunk['capacity'].to_numpy(copy=True))
+        chunks['cost'].append(chunk['cost'].to_numpy(copy=True))
+
+    if source is None:
+        raise ValueError(f"no arcs in the network file '{input_file}'")
+
+    node_dtype = _node_dtype(nodes)
+    arrays = [np.concatenate(chunks['node_i']).astype(node_dtype, copy=False),
+              np.concatenate(chunks['node_j']).astype(node_dtype, copy=False),
+              np.concatenate(chunks['capacity']),
+              np.concatenate(chunks['cost'])]
+
+    if cache_dir is not None:
+        _write_binary_cache(cache_dir, path, stat, arrays, nodes, source, terminal)
+
+    return [NetworkStore(*arrays), nodes, source, terminal]
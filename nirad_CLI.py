@@ -7,21 +7,57 @@ S.H.I.E.L.D.
 """
 
 import nirad_utils as shu
+import nirad_commands as cmd
+from prompt_history import PromptHistory
 from smolagents import CodeAgent
-import pandas as pd
+import argparse
 from colorama import Fore, Back, Style
 
-list_tools=[shu.compute_worst_case_attack, shu.compute_resilience, shu.compute_max_flow, shu.get_network, shu.generate_input_data, shu.change_capacity, shu.change_cost, shu.reset_values]
+list_tools=[shu.compute_worst_case_attack, shu.compute_worst_case_attack_sweep, shu.compute_resilience, shu.compute_resilience_sweep, shu.compute_max_flow, shu.get_network, shu.generate_input_data, shu.change_capacity, shu.change_cost, shu.update_arcs, shu.reset_values]
 
 agent = CodeAgent(tools=list_tools, model=shu.model, additional_authorized_imports=['pandas','io'], max_steps=15, verbosity_level=-1)  #-1 to suppress reasoning steps
 
 
 
 
+#commands (e.g. /maxflow, /attack 5, /resilience F=3 d=2, see /help) are run locally without calling the LLM
+#the history keeps the prompt within a token budget, bulky answers are replaced by references
+def answer(user_query, history):
+    history.add_query(user_query)
+    if cmd.is_command(user_query):
+        try:
+            r = cmd.run_command(user_query)
+        except cmd.CommandError as e:
+            r = f'Error: {e}'
+    else:
+        r = shu.retry(agent,history.prompt())
+    history.add_answer(r)
+    return r
+
+
+#run the queries of a file, one per line (empty lines and lines starting with # are skipped)
+def batch(input_file, history):
+    with open(input_file) as f:
+        for line in f:
+            user_query = line.strip()
+            if not user_query or user_query.startswith('#'):
+                continue
+            print(Fore.GREEN + Style.BRIGHT+"N.I.R.A.D.> "+ Style.RESET_ALL+user_query)
+            r=answer(user_query, history)
+            print(Fore.RED + Style.BRIGHT+"(Answer) "+Style.RESET_ALL+cmd.format_output(r)+"\n")
+
+
 #type exit to exit
 def main():
+    parser = argparse.ArgumentParser(description='N.I.R.A.D. command-line interface')
+    parser.add_argument('--batch', help='file with the queries to run, one per line')
+    args = parser.parse_args()
+    
+    history = PromptHistory(f'{shu.prompt_NIRAD_v2}\n {shu.few_shot_examples_v2}')
+    if args.batch:
+        batch(args.batch, history)
+        return
     
-    prompt=f'{shu.prompt_NIRAD_v2}\n {shu.few_shot_examples_v2}'
     while True:
           print(Fore.GREEN + Style.BRIGHT+"N.I.R.A.D.> Enter your query:"+ Style.RESET_ALL, end="")
      
@@ -29,11 +65,9 @@ def main():
           if user_query.lower() == "exit":
     
               break
-          prompt=f'{prompt}\n User Query: {user_query}' 
-          r=shu.retry(agent,prompt)
+          r=answer(user_query, history)
          
-          print(Fore.RED + Style.BRIGHT+"(Answer) "+Style.RESET_ALL+str(r)+"\n")
-          prompt=f'{prompt}\n Answer: {r}' 
+          print(Fore.RED + Style.BRIGHT+"(Answer) "+Style.RESET_ALL+cmd.format_output(r)+"\n")
 
  
     
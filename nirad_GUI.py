@@ -7,10 +7,11 @@
 '''
 
 import nirad_utils as shu
+import nirad_commands as cmd
+from prompt_history import PromptHistory
 from smolagents import CodeAgent
-import pandas as pd
-from colorama import Fore, Back, Style
 import streamlit as st
+import time
 
 #for windows
 #from playsound import playsound #use version 1.2.2
@@ -27,9 +28,28 @@ st.set_page_config(page_title="N.I.R.A.D.", page_icon="images/nirad_icon.ico", l
 
 initial_prompt=f'{shu.prompt_NIRAD_v2}\n {shu.few_shot_examples_v2}\n'
 
-list_tools=[shu.compute_worst_case_attack, shu.compute_resilience, shu.compute_max_flow, shu.get_network, shu.generate_input_data, shu.change_capacity, shu.change_cost, shu.reset_values]
+list_tools=[shu.compute_worst_case_attack, shu.compute_worst_case_attack_sweep, shu.compute_resilience, shu.compute_resilience_sweep, shu.compute_max_flow, shu.get_network, shu.generate_input_data, shu.change_capacity, shu.change_cost, shu.update_arcs, shu.reset_values]
 
-agent = CodeAgent(tools=list_tools, model=shu.model, additional_authorized_imports=['pandas','io'], max_steps=10, verbosity_level=-1)  #-1 to suppress reasoning steps
+#LLM client and baseline network, created once and shared by all the sessions and reruns
+@st.cache_resource
+def load_model():
+    return shu.get_model()
+
+@st.cache_resource
+def load_baseline_network():
+    return shu.baseline_network()
+
+
+def new_agent():
+    return CodeAgent(tools=st.session_state.network_session.bind_tools(list_tools), model=load_model(), additional_authorized_imports=['pandas','io'], max_steps=10, verbosity_level=-1)  #-1 to suppress reasoning steps
+
+
+#each session works on its own copy of the network (the baseline network is shared), with its own agent,
+#both created at the first interaction of the session and kept across reruns
+if "network_session" not in st.session_state:
+    st.session_state.network_session = shu.NetworkSession(*load_baseline_network())
+    st.session_state.agent = new_agent()
+    st.session_state.agent_run = None
 
 
 
@@ -60,7 +80,21 @@ if "messages" not in st.session_state:
 
     
 if "chat_history" not in st.session_state:
-    st.session_state.chat_history = initial_prompt  # Initialize an empty chat history
+    st.session_state.chat_history = PromptHistory(initial_prompt)  # chat history kept within a token budget
+
+#a query left here was interrupted by a rerun (Stop button, or a new query): if it is still running it is
+#cancelled. The interrupted agent can still be finishing its step on its thread, the next queries use a new agent
+if st.session_state.agent_run is not None:
+    run = st.session_state.agent_run
+    st.session_state.agent_run = None
+    if run.done():
+        output = shu.agent_answer(run)
+    else:
+        run.cancel()
+        st.session_state.agent = new_agent()
+        output = 'Error: the query was cancelled'
+    st.session_state.chat_history.add_answer(output)
+    st.session_state.messages.append({"role": "NIRAD", "content": cmd.format_output(output), "avatar":"images/nirad_gpt.png"})
 
 # Display the conversation history
 for message in st.session_state.messages:
@@ -71,16 +105,6 @@ for message in st.session_state.messages:
             st.text(message["content"])
       
 
-#reset network data when new execution            
-if "reset_executed" not in st.session_state:
-    st.session_state.reset_executed = False
-
-# Run shu.reset_values() if it hasn't been executed in this session
-if not st.session_state.reset_executed:
-    shu.reset_values()  # Call your function here
-    st.session_state.reset_executed = True
-     
-
 # Handling user input style
 st.markdown("""
     <style>
@@ -108,13 +132,33 @@ if prompt := st.chat_input(">>"):
             #playsound("static/mixkit-sci-fi-click-900.mp3")
         
     # Append the new user input to the chat history
-    st.session_state.chat_history += f"User: {prompt}\n"
+    st.session_state.chat_history.add_query(prompt)
     
 
     # Call N.I.R.A.D. agent to get the response
     with st.chat_message("NIRAD", avatar="images/nirad_gpt.png"):
 
-        response = shu.retry(agent, st.session_state.chat_history)
+        #commands (e.g. /maxflow, /attack 5, see /help) are run locally without calling the LLM
+        if cmd.is_command(prompt):
+            try:
+                output = cmd.run_command(prompt, st.session_state.network_session)
+            except cmd.CommandError as e:
+                output = f'Error: {e}'
+        else:
+            #the agent runs in the background, with a timeout and backoff on rate limits. The script waits
+            #updating the status, so that a click on Stop reruns it at once (and the rerun cancels the query)
+            st.session_state.agent_run = shu.start_agent(st.session_state.agent, st.session_state.chat_history.prompt())
+            st.button("Stop", key="stop_agent")
+            status = st.empty()
+            start = time.time()
+            while not st.session_state.agent_run.done():
+                status.text(f"N.I.R.A.D. is working... {time.time() - start:.0f} s")
+                time.sleep(0.25)
+            status.empty()
+            #answer, or the error message (timeout, LLM error)
+            output = shu.agent_answer(st.session_state.agent_run)
+            st.session_state.agent_run = None
+        response = cmd.format_output(output)
         st.text(response)
         if enable_sound:
             #fow windows
@@ -122,8 +166,8 @@ if prompt := st.chat_input(">>"):
             pygame.mixer.music.load("static/mixkit-opening-software-interface-2578.mp3")
             pygame.mixer.music.play()
         
-        # Append the agent's response to the chat history
-        st.session_state.chat_history += f"Answer: {response}\n"
+        # Append the agent's response to the chat history (bulky outputs are replaced by references)
+        st.session_state.chat_history.add_answer(output)
     
     # Append the assistant's response to the session state
     st.session_state.messages.append({"role": "NIRAD", "content": response, "avatar":"images/nirad_gpt.png"})
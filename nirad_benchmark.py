@@ -0,0 +1,184 @@
+'''author__ = 'Alberto Costa'
+   mail = 'noobsajbot@gmail.com'
+   date = '18 Oct 2026'
+
+   benchmark of the NIRAD tools on synthetic networks
+
+   python nirad_benchmark.py --sizes small medium --output report.json
+   python nirad_benchmark.py --sizes small --baseline report.json  (compare with a previous report)
+'''
+
+import argparse
+import datetime
+import json
+import platform
+import time
+import tracemalloc
+
+import nirad_utils as shu
+from network_generators import generators
+from result_cache import ResultCache
+
+
+#parameters of the generators for each size
+sizes = {
+    'small': {'grid': dict(rows=5, cols=5), 'layered_dag': dict(layers=4, width=5),
+              'random_geometric': dict(n=30), 'scale_free': dict(n=30)},
+    'medium': {'grid': dict(rows=15, cols=15), 'layered_dag': dict(layers=10, width=20),
+               'random_geometric': dict(n=300), 'scale_free': dict(n=300)},
+    'large': {'grid': dict(rows=40, cols=40), 'layered_dag': dict(layers=30, width=50),
+              'random_geometric': dict(n=2000), 'scale_free': dict(n=2000)},
+    }
+
+
+#iteration counts reported by the tools
+iteration_counts = ['optimality_iter', 'feasibility_iter', 'cuts', 'blocking_flows']
+
+
+def _call(tool, data, args):
+    #fresh state: no cached results, no flow kept from a previous call
+    shu.result_cache = ResultCache(max_entries=0)
+    shu.default_session.flow_network = None
+    if tool == 'compute_max_flow':
+        return shu.compute_max_flow(data=data, backend='native', stats=True)
+    if tool == 'compute_max_flow_pyomo':
+        return shu.compute_max_flow(data=data, backend='pyomo', stats=True)
+    if tool == 'compute_worst_case_attack':
+        return shu.compute_worst_case_attack(data=data, attacker_budget=args.attacker_budget, stats=True)
+    if tool == 'compute_resilience':
+        d = args.d_ratio * shu.max_flow_native.max_flow(data).value
+        return shu.compute_resilience(data=data, F=args.F, d=d, stats=True)
+    raise ValueError(f"unknown tool '{tool}'")
+
+
+def _value(result):
+    if 'gamma' in result:
+        return float(result['gamma'])
+    return float(result['max_flow_value'])
+
+
+def run_tool(tool, data, args):
+    '''
+    Run {tool} on {data}, return a dictionary with the wall time of the tool, the
+    statistics measured by the tool itself (time of each phase, time spent building
+    the model instances and solving them, iteration counts, size of the instances),
+    the peak memory and the value found
+    '''
+    entry = {'tool': tool}
+
+    start = time.perf_counter()
+    result = _call(tool, data, args)
+    entry['time'] = time.perf_counter() - start
+    entry['value'] = _value(result)
+
+    #no instance is built (and no build time counted) when the native algorithm or the minimum cuts settle the problem
+    statistics = result['stats']
+    phase_times = statistics['phase_times']
+    entry['phase_times'] = phase_times
+    entry['build_time'] = phase_times.get('instance_creation', 0.0)
+    entry['solve_time'] = sum(t for phase, t in phase_times.items() if phase.endswith('_solve'))
+    entry['variables'] = statistics['variables']
+    entry['constraints'] = statistics['constraints']
+    entry['iterations'] = {name: statistics[name] for name in iteration_counts if name in statistics}
+    if 'settled_by_preprocessing' in statistics:
+        entry['settled_by_preprocessing'] = statistics['settled_by_preprocessing']
+
+    if args.memory:
+        #separate run, tracemalloc slows down the tool
+        tracemalloc.start()
+        _call(tool, data, args)
+        entry['peak_memory_mb'] = tracemalloc.get_traced_memory()[1] / 2**20
+        tracemalloc.stop()
+    return entry
+
+
+def run(args):
+    report = {
+        'date': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'solver_backend': shu.solver_backend,
+        'solver_options': shu.solver_options,
+        'reduce_networks': shu.reduce_networks,
+        'model_builder': shu.model_builder,
+        'seed': args.seed,
+        'results': [],
+        }
+    for size in args.sizes:
+        for generator in args.generators:
+            params = sizes[size][generator]
+            data = generators[generator](seed=args.seed, **params)
+            network = f'{generator}-{size}'
+            print(f"{network}: {data['n'][None]} nodes, {len(data['A'][None])} arcs")
+            for tool in args.tools:
+                entry = run_tool(tool, data, args)
+                entry.update({'network': network, 'generator': generator, 'size': size, 'params': params,
+                              'nodes': data['n'][None], 'arcs': len(data['A'][None])})
+                report['results'].append(entry)
+                print(f"    {tool}: {entry['time']:.3f}s (build {entry['build_time']:.3f}s, solve {entry['solve_time']:.3f}s), value {entry['value']}")
+    return report
+
+
+def compare(report, baseline, threshold):
+    '''
+    Print the time of each (network, tool) relative to the baseline report, return
+    the number of regressions (ratio above {threshold}) and of changed values
+    '''
+    previous = {(r['network'], r['tool']): r for r in baseline['results']}
+    problems = 0
+    for entry in report['results']:
+        old = previous.get((entry['network'], entry['tool']))
+        if old is None:
+            continue
+        ratio = entry['time'] / old['time'] if old['time'] > 0 else float('inf')
+        flags = []
+        if ratio > threshold:
+            flags.append('SLOWER')
+        if abs(entry['value'] - old['value']) > 1e-6:
+            flags.append(f"VALUE {old['value']} -> {entry['value']}")
+        problems += len(flags) > 0
+        print(f"{entry['network']:28} {entry['tool']:28} {old['time']:8.3f}s -> {entry['time']:8.3f}s  x{ratio:.2f} {' '.join(flags)}")
+    return problems
+
+
+def main():
+    tools = ['compute_max_flow', 'compute_max_flow_pyomo', 'compute_worst_case_attack', 'compute_resilience']
+    parser = argparse.ArgumentParser(description='Benchmark of the NIRAD tools on synthetic networks')
+    parser.add_argument('--sizes', nargs='+', default=['small'], choices=list(sizes))
+    parser.add_argument('--generators', nargs='+', default=list(generators), choices=list(generators))
+    parser.add_argument('--tools', nargs='+', default=tools, choices=tools)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--solver', choices=list(shu.solver_backends.backends), help='solver backend to use instead of solver_backend of nirad_utils')
+    parser.add_argument('--time-limit', type=float, help='time limit of each solve, in seconds')
+    parser.add_argument('--mip-gap', type=float, help='relative MIP gap of the solver')
+    parser.add_argument('--threads', type=int, help='threads of the solver')
+    parser.add_argument('--model-builder', choices=['pyomo', 'matrix'], help='model builder to use instead of model_builder of nirad_utils')
+    parser.add_argument('--attacker-budget', type=float, default=5.0)
+    parser.add_argument('--F', type=float, default=2.0, help='fortification budget of compute_resilience')
+    parser.add_argument('--d-ratio', type=float, default=0.5, help='minimum flow of compute_resilience, as a fraction of the max flow')
+    parser.add_argument('--no-memory', dest='memory', action='store_false', help='do not measure the peak memory (one run per tool instead of two)')
+    parser.add_argument('--output', default='benchmark_report.json')
+    parser.add_argument('--baseline', help='previous report to compare with')
+    parser.add_argument('--threshold', type=float, default=1.25, help='time ratio reported as a regression')
+    args = parser.parse_args()
+    if args.solver:
+        shu.solver_backend = args.solver
+    shu.solver_options = {key: value for key, value in (('time_limit', args.time_limit), ('mip_gap', args.mip_gap), ('threads', args.threads))
+                          if value is not None}
+    if args.model_builder:
+        shu.model_builder = args.model_builder
+
+    report = run(args)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f'report written to {args.output}')
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        problems = compare(report, baseline, args.threshold)
+        raise SystemExit(1 if problems else 0)
+
+
+if __name__ == '__main__':
+    main()
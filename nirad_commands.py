@@ -0,0 +1,214 @@
+'''author__ = 'Alberto Costa'
+   mail = 'noobsajbot@gmail.com'
+   date = '18 Oct 2026'
+
+   deterministic commands, parsed locally and dispatched straight to the tools (no LLM call)
+
+   /maxflow [backend=native|pyomo]
+   /attack 5
+   /attack_sweep 1 2 5 10
+   /resilience F=3 d=2 [persistent=true] [time_budget=30] [max_iterations=50] [tolerance=0.01] [relative_tolerance=0.01] [adaptive=false]
+   /resilience_sweep F=1,2,3 d=2,4
+   (the solver commands also take solver=highs|gurobi|cplex|cbc|glpk|scip time_limit=60 mip_gap=0.01 threads=4)
+   /network
+   /capacity 1 2 10 [3 4 5 ...]        (arc 1->2 gets capacity 10)
+   /cost 1 2 4.5 [3 4 2 ...]           (arc 1->2 gets destruction cost 4.5)
+   /reset
+   /help
+'''
+
+import shlex
+
+import nirad_utils as shu
+
+
+class CommandError(ValueError):
+    '''
+    Command that cannot be parsed or executed
+    '''
+
+
+def is_command(text):
+    return text.strip().startswith('/')
+
+
+def _number(text, name):
+    try:
+        return float(text)
+    except (TypeError, ValueError):
+        raise CommandError(f"{name} must be a number, got '{text}'")
+
+
+def _numbers(text, name):
+    return [_number(value, name) for value in text.replace(',', ' ').split()]
+
+
+def _flag(text):
+    return str(text).lower() in ('1', 'true', 'yes', 'y')
+
+
+def _get(args, kwargs, name, position):
+    #value of a parameter given as name=value or by position
+    if name in kwargs:
+        return kwargs[name]
+    if position < len(args):
+        return args[position]
+    raise CommandError(f"missing parameter '{name}'")
+
+
+def _triples(args, name):
+    #i j value i j value ... -> arcs, values
+    if len(args) == 0 or len(args) % 3 != 0:
+        raise CommandError(f"expected triples 'node_i node_j {name}'")
+    arcs = []
+    values = []
+    for k in range(0, len(args), 3):
+        try:
+            arcs.append((int(args[k]), int(args[k + 1])))
+        except ValueError:
+            raise CommandError(f"node ids must be integers, got '{args[k]} {args[k + 1]}'")
+        values.append(_number(args[k + 2], name))
+    return arcs, values
+
+
+def _solver(kwargs):
+    #solver backend and options of the call
+    solver = kwargs.get('solver')
+    if solver is not None and solver not in shu.solver_backends.backends:
+        raise CommandError(f"unknown solver '{solver}', available: {', '.join(shu.solver_backends.backends)}")
+    options = dict()
+    for name in ('time_limit', 'mip_gap', 'threads'):
+        if name in kwargs:
+            options[name] = _number(kwargs[name], name)
+    if 'threads' in options:
+        options['threads'] = int(options['threads'])
+    return {'solver': solver, 'solver_options': options}
+
+
+def _maxflow(session, args, kwargs):
+    backend = kwargs.get('backend', args[0] if args else None)
+    if backend not in (None, 'native', 'pyomo'):
+        raise CommandError(f"unknown backend '{backend}'")
+    return session.compute_max_flow(session.generate_input_data(), backend, **_solver(kwargs))
+
+
+def _attack(session, args, kwargs):
+    budget = _number(_get(args, kwargs, 'budget', 0), 'budget')
+    return shu.compute_worst_case_attack(data=session.generate_input_data(), attacker_budget=budget, **_solver(kwargs))
+
+
+def _attack_sweep(session, args, kwargs):
+    budgets = _numbers(kwargs['budgets'] if 'budgets' in kwargs else ' '.join(args), 'budget')
+    if not budgets:
+        raise CommandError("missing parameter 'budgets'")
+    return shu.compute_worst_case_attack_sweep(data=session.generate_input_data(), attacker_budgets=budgets, **_solver(kwargs))
+
+
+def _resilience(session, args, kwargs):
+    F = _number(_get(args, kwargs, 'F', 0), 'F')
+    d = _number(_get(args, kwargs, 'd', 1), 'd')
+    time_budget = _number(kwargs['time_budget'], 'time_budget') if 'time_budget' in kwargs else None
+    max_iterations = int(_number(kwargs['max_iterations'], 'max_iterations')) if 'max_iterations' in kwargs else None
+    tolerance = _number(kwargs['tolerance'], 'tolerance') if 'tolerance' in kwargs else None
+    relative_tolerance = _number(kwargs['relative_tolerance'], 'relative_tolerance') if 'relative_tolerance' in kwargs else None
+    adaptive = _flag(kwargs['adaptive']) if 'adaptive' in kwargs else None
+    if (tolerance is not None and tolerance <= 0) or (relative_tolerance is not None and relative_tolerance <= 0):
+        raise CommandError('the tolerances must be positive')
+    return shu.compute_resilience(data=session.generate_input_data(), F=F, d=d, persistent=_flag(kwargs.get('persistent', False)),
+                                  time_budget=time_budget, max_iterations=max_iterations, tolerance=tolerance,
+                                  relative_tolerance=relative_tolerance, adaptive=adaptive, **_solver(kwargs))
+
+
+def _resilience_sweep(session, args, kwargs):
+    F_values = _numbers(_get(args, kwargs, 'F', 0), 'F')
+    d_values = _numbers(_get(args, kwargs, 'd', 1), 'd')
+    return shu.compute_resilience_sweep(data=session.generate_input_data(), F_values=F_values, d_values=d_values,
+                                        persistent=_flag(kwargs.get('persistent', False)), **_solver(kwargs))
+
+
+def _network(session, args, kwargs):
+    return session.get_network()
+
+
+def _existing(session, arcs):
+    missing = [arc for arc in arcs if session.network_data.row(arc) is None]
+    if missing:
+        raise CommandError(f"arcs not in the network: {missing}")
+
+
+def _capacity(session, args, kwargs):
+    arcs, values = _triples(args, 'capacity')
+    _existing(session, arcs)
+    session.update_arcs(arcs, new_capacities=values)
+    return session.get_network()
+
+
+def _cost(session, args, kwargs):
+    arcs, values = _triples(args, 'cost')
+    _existing(session, arcs)
+    session.update_arcs(arcs, new_costs=values)
+    return session.get_network()
+
+
+def _reset(session, args, kwargs):
+    session.reset_values()
+    return 'network reset to the initial values'
+
+
+def _help(session, args, kwargs):
+    return __doc__.split('\n\n', 1)[1].strip()
+
+
+commands = {
+    'maxflow': _maxflow,
+    'attack': _attack,
+    'attack_sweep': _attack_sweep,
+    'resilience': _resilience,
+    'resilience_sweep': _resilience_sweep,
+    'network': _network,
+    'capacity': _capacity,
+    'cost': _cost,
+    'reset': _reset,
+    'help': _help,
+    }
+
+
+def parse_command(text):
+    '''
+    Split a command into (name, positional arguments, keyword arguments)
+    '''
+    try:
+        tokens = shlex.split(text.strip()[1:])
+    except ValueError as e:
+        raise CommandError(str(e))
+    if not tokens:
+        raise CommandError('empty command, type /help')
+    name = tokens[0].lower().replace('-', '_')
+    args = []
+    kwargs = dict()
+    for token in tokens[1:]:
+        if '=' in token:
+            key, value = token.split('=', 1)
+            kwargs[key] = value
+        else:
+            args.append(token)
+    return name, args, kwargs
+
+
+def run_command(text, session=None):
+    '''
+    Execute a command on {session} (the default session of nirad_utils if not given)
+    and return the output of the tool. Raise CommandError for an invalid command.
+    '''
+    if session is None:
+        session = shu.default_session
+    name, args, kwargs = parse_command(text)
+    if name not in commands:
+        raise CommandError(f"unknown command '/{name}', type /help")
+    return commands[name](session, args, kwargs)
+
+
+def format_output(output):
+    if hasattr(output, 'to_string'):
+        return output.to_string()
+    return str(output)
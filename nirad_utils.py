@@ -8,69 +8,577 @@
 
 from __future__ import division
 from smolagents import tool, OpenAIServerModel
-from pyomo.environ import *
-import pandas as pd
+import functools
+from lazy_module import LazyModule
 import numpy as np
 import copy
 from typing import Optional, Tuple, List, TypeVar
-import max_flow as maxflow_abstract
-import optimality_robust as rob_opt
-import feasibility_robust as rob_feas
+import max_flow_native
+from network_store import load_network
+from result_cache import ResultCache, fingerprint
+from network_reduction import ReducedNetwork
 import os
+import time
+import agent_runner
+import solver_backends
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+from itertools import product
+from bisect import bisect_right
 
 
 DataFrame = TypeVar('pandas.core.frame.DataFrame')
-MILP_solver = 'glpk'
 
-global network_data
-global nodes
-global source
-global terminal
-global network_data_b
-global nodes_b
-global source_b
-global terminal_b
+
+#imported at the first use: Pyomo and the models are only loaded (and the AbstractModels built) when a tool needs them
+pd = LazyModule('pandas')
+pyo = LazyModule('pyomo.environ')
+maxflow_abstract = LazyModule('max_flow')
+rob_opt = LazyModule('optimality_robust')
+rob_feas = LazyModule('feasibility_robust')
+matrix_models = LazyModule('matrix_models')
+
+
+solver_backend = 'highs' #solver of the Pyomo models, see solver_backends.py: 'highs', 'gurobi', 'cplex', 'cbc', 'glpk', 'scip' (if missing, the next available one is used)
+solver_options = dict() #default options of the solver: time_limit (seconds), mip_gap (relative), threads
+max_flow_backend = 'native' #'native' (built-in Dinic algorithm) or 'pyomo' (LP solved with the solver backend)
+reduce_networks = True #remove dead ends and collapse series chains (and parallel arcs) before building the Pyomo instances (node ids are always compacted)
+model_builder = 'pyomo' #'pyomo' (Pyomo models solved with the solver backend) or 'matrix' (sparse matrices built directly from the arcs and solved in-process with HiGHS, see matrix_models.py)
 
 GOOGLE_API_KEY=os.environ.get('GOOGLE_API_KEY')
 
+#cache of the results of compute_max_flow, compute_worst_case_attack and compute_resilience
+#set NIRAD_CACHE_DIR to also keep the results on disk between sessions
+result_cache = ResultCache(max_entries=128, persist_dir=os.environ.get('NIRAD_CACHE_DIR'))
+
+#function called as metrics_hook(tool name, statistics) at the end of each instrumented
+#computation (compute_max_flow, compute_worst_case_attack, compute_resilience), e.g. to log the
+#statistics or send them to a monitoring system
+metrics_hook = None
+
+resilience_tolerance = 0.1 #default absolute precision of the resilience computed by compute_resilience
+resilience_adaptive = True #compute_resilience brackets the resilience with coarse steps first, refined down to the tolerance
+resilience_time_budget = None #default time budget (seconds) of compute_resilience, e.g. to bound the latency of the agent, None to run until convergence
+agent_timeout = 600 #seconds given to the agent to answer a query, None for no limit
+agent_max_retries = 6 #retries of a query after a rate limit error
+
 input_file='input/network_test.txt'
+load_chunk_rows = 1000000 #rows of the input file parsed at a time
+network_cache_dir = None #directory for the binary (memory-mapped) copy of the parsed input file, None to disable
 
 
 def load_data(input_file=input_file):
    # G = nx.read_edgelist(input_file, nodetype=int, data=(("capacity", float), ("destruction_cost", float)))
-   network_data=pd.read_csv(input_file, header = None, sep=" ")
-   network_data.columns=['node i','node j','capacity','cost']
-   source=int(network_data.iloc(0)[0]['node i']) #first node
-   terminal=int(network_data.iloc(0)[network_data.shape[0]-1]['node j'])
-   nodes = max (max(network_data['node i']), max(network_data['node j']))
-   return [network_data,nodes,source,terminal]
+   return load_network(input_file, chunk_rows=load_chunk_rows, cache_dir=network_cache_dir)
+
+
+
+#baseline network, read at the first use and shared by all the sessions
+@functools.lru_cache(maxsize=None)
+def baseline_network():
+    return load_data()
+
+
+class NetworkSession:
+    '''
+    Network state of one user session (e.g. one Streamlit session): a view of the
+    shared baseline network with its own changes, and the number of nodes, source
+    and terminal. The tools that read or change the network are implemented as
+    methods, bind_tools returns the agent tools bound to this session.
+    '''
+
+    #tools implemented by the session
+    session_tools = ['generate_input_data', 'get_network', 'get_source', 'get_terminal',
+                     'reset_values', 'change_capacity', 'change_cost', 'update_arcs', 'compute_max_flow']
+
+    def __init__(self, network_data=None, nodes=None, source=None, terminal=None):
+        if network_data is None:
+            [network_data, nodes, source, terminal]=baseline_network()
+        self.network_data = network_data.view()
+        self.nodes = nodes
+        self.source = source
+        self.terminal = terminal
+        self.initial_values = (nodes, source, terminal)
+        self.flow_network = None #last native max flow of the session network, repaired after capacity changes
+        self.flow_rows = set() #rows whose capacity changed since flow_network was computed
+        self.duplicate_rows = dict() #rows of the arcs listed more than once, by the row of their first occurrence
+        self.current_fingerprint = None #fingerprint of the data of the session network, None after a change
+
+    def _capacity_changed(self, rows):
+        self.flow_rows.update(row for row in rows if row >= 0)
+        self.current_fingerprint = None
+
+    def bind_tools(self, tools):
+        '''
+        Return the list of tools where the ones reading or changing the network
+        operate on this session
+        '''
+        bound_tools = []
+        for t in tools:
+            if t.name in self.session_tools:
+                t = copy.copy(t)
+                t.forward = getattr(self, t.name)
+            bound_tools.append(t)
+        return bound_tools
+
+    def generate_input_data(self):
+        data = self.network_data.data_dict(self.nodes, self.source, self.terminal)
+        self.current_fingerprint = fingerprint(data)
+        return data
+
+    def get_network(self):
+        return self.network_data.to_frame()
+
+    def get_source(self):
+        return self.source
+
+    def get_terminal(self):
+        return self.terminal
+
+    def reset_values(self):
+        self._capacity_changed(list(self.network_data.capacity_edits))
+        self.network_data.reset()
+        [self.nodes, self.source, self.terminal]=self.initial_values
+
+    def change_capacity(self, arcs, new_capacities):
+        if len(arcs)==len(new_capacities):
+            self.network_data.update(arcs, capacity=new_capacities)
+            self._capacity_changed(self.network_data.rows(arcs).tolist())
+
+    def change_cost(self, arcs, new_costs):
+        if len(arcs)==len(new_costs):
+            self.network_data.update(arcs, cost=new_costs)
+            self.current_fingerprint = None
+
+    def update_arcs(self, arcs, new_capacities=None, new_costs=None):
+        if new_capacities is not None and len(arcs)!=len(new_capacities):
+            return
+        if new_costs is not None and len(arcs)!=len(new_costs):
+            return
+        self.network_data.update(arcs, capacity=new_capacities, cost=new_costs)
+        if new_capacities is not None:
+            self._capacity_changed(self.network_data.rows(arcs).tolist())
+        self.current_fingerprint = None
+
+    def max_flow_network(self, data, data_fingerprint=None):
+        '''
+        Native max flow on {data}. The last flow and residual network of the session
+        network are kept: when {data} holds the session network (its fingerprint, computed
+        if not given, is the one recorded by generate_input_data), only the capacities of
+        the rows changed since the previous call are updated and the flow is repaired
+        incrementally. Other data (e.g. a dictionary edited in place) are solved from
+        scratch, and do not replace the kept flow.
+        '''
+        if data_fingerprint is None:
+            data_fingerprint = fingerprint(data)
+        if self.current_fingerprint is None or data_fingerprint != self.current_fingerprint:
+            return max_flow_native.max_flow(data)
+        network = self.flow_network
+        if network is not None and network.source == data['s'][None] and network.terminal == data['t'][None]:
+            arcs = data['A'][None]
+            capacity = data['capacity']
+            changes = []
+            for row in self.flow_rows:
+                #a duplicated arc has one capacity, on all its rows
+                for k in self.duplicate_rows.get(row, (row,)):
+                    changes.append((k, capacity[arcs[k]]))
+            if changes:
+                network.update_capacities(changes)
+        else:
+            network = max_flow_native.max_flow(data)
+            self.flow_network = network
+            self.duplicate_rows = dict()
+            if len(self.network_data.index) < len(self.network_data):
+                index = self.network_data.index
+                for k, arc in enumerate(self.network_data.arcs):
+                    self.duplicate_rows.setdefault(index[arc], []).append(k)
+                self.duplicate_rows = {row: rows for row, rows in self.duplicate_rows.items() if len(rows) > 1}
+        self.flow_rows.clear()
+        return network
+
+    def compute_max_flow(self, data, backend=None, solver=None, solver_options=None, stats=False):
+        if backend is None:
+            backend = max_flow_backend
+        solver, options = solver_settings(solver, solver_options)
+
+        data_fingerprint = fingerprint(data)
+        key = result_cache.key('compute_max_flow', data_fingerprint, backend, solver, options)
+        flow_dict = result_cache.get(key)
+        if flow_dict is not None:
+            if stats:
+                flow_dict['stats'] = {'cached': True}
+            return flow_dict
+
+        timer = PhaseTimer()
+        counts = {'optimality_iter': 0, 'blocking_flows': 0, 'repaired': False, 'variables': 0, 'constraints': 0}
+        if backend == 'native':
+            previous = self.flow_network
+            blocking_flows = previous.blocking_flows if previous is not None else 0
+            with timer.phase('max_flow_solve'):
+                network = self.max_flow_network(data, data_fingerprint)
+            #a repaired flow keeps the count of the blocking flows pushed by the previous calls
+            counts['repaired'] = network is previous
+            counts['blocking_flows'] = network.blocking_flows - (blocking_flows if network is previous else 0)
+            with timer.phase('solution_loading'):
+                flow_dict=dict()
+                for arc, flow in zip(network.arcs, network.flows()):
+                    if flow>0:
+                        flow_dict[arc] = flow
+                flow_dict['max_flow_value'] = network.value
+        else:
+            flow_dict = max_flow_pyomo(data, solver, options, timer, counts)
+        result_cache.put(key, flow_dict)
 
+        statistics = {'phase_times': timer.times, 'total_time': timer.total(), **counts}
+        if metrics_hook is not None:
+            metrics_hook('compute_max_flow', statistics)
+        if stats:
+            flow_dict['stats'] = statistics
+        return flow_dict
 
 
-#initialize variables
-[network_data, nodes, source, terminal]=load_data()
+#session used by the module-level tools (CLI), created at the first use
+def get_default_session():
+    global default_session
+    try:
+        return default_session
+    except NameError:
+        default_session = NetworkSession()
+        return default_session
 
-#backup variables
-[network_data_b,nodes_b,source_b,terminal_b]=load_data()
 
+#objects created at their first use: the default session and its variables, the baseline network, the LLM client
+def __getattr__(name):
+    if name == 'default_session':
+        return get_default_session()
+    if name == 'network_data':
+        return get_default_session().network_data
+    if name in ('nodes', 'source', 'terminal'):
+        return getattr(get_default_session(), name)
+    if name in ('network_data_b', 'network_base'):
+        return baseline_network()[0]
+    if name in ('nodes_b', 'source_b', 'terminal_b'):
+        return baseline_network()[['nodes_b', 'source_b', 'terminal_b'].index(name) + 1]
+    if name == 'model':
+        return get_model()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
-#function to wait while increasing waiting time (20 to 80 seconds, 2* increase) in case there is a problem of max quota reached
-def retry(agent, prompt):
-    backoff = 20
-    while True:
+
+#start the agent in the background, retrying on rate limits (jittered backoff, honoring the retry-after hints)
+#and interrupting it after agent_timeout seconds. The returned run can be cancelled (see agent_runner.AgentRun)
+def start_agent(agent, prompt, timeout=None):
+    if timeout is None:
+        timeout = agent_timeout
+    return agent_runner.AgentRun(agent, prompt, timeout=timeout, max_retries=agent_max_retries)
+
+
+#answer of a run started by start_agent, or the error message (timeout, cancellation, LLM error) if there is no answer
+def agent_answer(run):
+    try:
+        return run.result()
+    except Exception as e:
+        print("Error:", e)
+        return f'Error: {e}'
+
+
+#run the agent and wait for its answer (or the error message)
+def retry(agent, prompt, timeout=None):
+    return agent_answer(start_agent(agent, prompt, timeout))
+
+
+
+
+class PhaseTimer:
+    '''
+    Wall time spent in each phase of a computation, a phase can be entered several times
+    '''
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.times = dict()
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
         try:
-            response = agent.run(prompt)
-            return response
-            break  # Success
-        except Exception as e:
-            if "429" in str(e):
-                print(f"Rate limit hit. Sleeping for {backoff} seconds...")
-                time.sleep(backoff)
-                backoff = min(backoff * 2, 80)  # max backoff = 80 seconds
+            yield
+        finally:
+            self.times[name] = self.times.get(name, 0.0) + time.perf_counter() - start
+
+    def total(self):
+        return time.perf_counter() - self.start
+
+
+
+def solver_settings(solver=None, options=None):
+    '''
+    Solver backend and options of a call: solver_backend and solver_options, unless
+    given in the call ({options} are merged with solver_options). Return
+    (backend name, options)
+    '''
+    merged = dict(solver_options)
+    merged.update(options or {})
+    unknown = set(merged) - {'time_limit', 'mip_gap', 'threads'}
+    if unknown:
+        raise ValueError(f"unknown solver options {sorted(unknown)}, use time_limit, mip_gap and threads")
+    return (solver or solver_backend), {key: value for key, value in sorted(merged.items()) if value is not None}
+
+
+def solver_for(solver=None, options=None):
+    '''
+    Pyomo solver of the backend {solver} with {options} (see solver_settings)
+    '''
+    solver, options = solver_settings(solver, options)
+    return solver_backends.solver_factory(solver, **options)
+
+
+#in-process solver for the persistent mode of compute_resilience
+def persistent_solver_for(instance, new_constraints=False, bound_changes=False, solver=None, options=None):
+    '''
+    Create a persistent solver holding {instance}, with the persistent interface of
+    the backend {solver} (HiGHS through highspy by default, or the next available
+    backend with a persistent interface, e.g. gurobi_persistent). Between two solves only the
+    deltas are sent to the solver: the mutable parameters, plus the new constraints
+    and the variable bounds if {new_constraints} and {bound_changes} are True.
+    Pyomo persistent interfaces (e.g. gurobi_persistent) need the deltas to be
+    pushed explicitly, see apply_persistent_deltas.
+    '''
+    from pyomo.solvers.plugins.solvers.persistent_solver import PersistentSolver
+    from pyomo.contrib.appsi.base import PersistentBase as AppsiPersistentSolver
+    solver, options = solver_settings(solver, options)
+    opt = solver_backends.solver_factory(solver, persistent=True, **options)
+    if isinstance(opt, AppsiPersistentSolver):
+        #appsi solvers detect the changes by themselves, restrict what is checked
+        opt.update_config.check_for_new_or_removed_constraints = new_constraints
+        opt.update_config.check_for_new_or_removed_vars = False
+        opt.update_config.check_for_new_or_removed_params = False
+        opt.update_config.check_for_new_objective = False
+        opt.update_config.update_constraints = False
+        opt.update_config.update_vars = bound_changes
+        opt.update_config.update_named_expressions = False
+        opt.update_config.update_objective = False
+    elif isinstance(opt, PersistentSolver):
+        opt.set_instance(instance)
+    else:
+        raise ValueError(f"solver '{solver}' is not a persistent solver")
+    return opt
+
+
+def apply_persistent_deltas(opt, constraints_to_update=(), new_constraints=(), updated_vars=()):
+    '''
+    Push the changes of the instance to a Pyomo persistent solver (gurobi_persistent,
+    cplex_persistent, ...). Nothing to do for the other solvers.
+    '''
+    from pyomo.solvers.plugins.solvers.persistent_solver import PersistentSolver
+    if not isinstance(opt, PersistentSolver):
+        return
+    for con in constraints_to_update:
+        opt.remove_constraint(con)
+        opt.add_constraint(con)
+    for con in new_constraints:
+        opt.add_constraint(con)
+    for var in updated_vars:
+        opt.update_var(var)
+
+
+
+#models of the worst-case attack and of the fortification, built with Pyomo or as sparse
+#matrices (matrix_models.py): same interface, the algorithms do not depend on the builder
+class _PyomoModel:
+    '''
+    Solver of a Pyomo instance shared by the attack and fortification models: the
+    backend {solver} with {options} (see solver_settings), or its persistent
+    interface if {persistent} is True
+    '''
+
+    def _init_solver(self, persistent, solver, options, **persistent_args):
+        solver, options = solver_settings(solver, options)
+        self.backend = solver_backends.resolve(solver, persistent)
+        self.persistent = persistent
+        self.bound = None
+        if persistent:
+            self.opt = persistent_solver_for(self.instance, solver=self.backend.name, options=options, **persistent_args)
+        else:
+            self.opt = solver_for(self.backend.name, options)
+
+    def _run(self, time_limit=None, **kwargs):
+        #solve within {time_limit} seconds (if given), the solution is not loaded yet
+        if time_limit is not None:
+            self.opt.options.update(self.backend.solver_options(time_limit=time_limit))
+        results = self.opt.solve(self.instance, load_solutions=False, **kwargs)
+        if len(results.solution) == 0:
+            raise solver_backends.SolverLimitReached(f'no solution found: {results.solver.termination_condition}')
+        return results
+
+    def size(self):
+        #(variables, constraints) of the instance
+        return self.instance.nvariables(), self.instance.nconstraints()
+
+    def _bound(self, results, objective, name):
+        #best bound proved by the solver ({name} is 'lower_bound' or 'upper_bound'), the objective if optimal
+        if results.solver.termination_condition == pyo.TerminationCondition.optimal:
+            return objective
+        bound = getattr(results.problem, name, None)
+        if bound is None or np.isnan(bound):
+            return -np.inf if name == 'lower_bound' else np.inf
+        return float(bound)
+
+
+class PyomoAttackModel(_PyomoModel):
+    '''
+    Worst-case attack model optimality_robust.py, solved with the backend {solver}
+    and {options} (see solver_settings), kept in the persistent solver if
+    {persistent} is True. The fortification y and the z of the solutions are arrays
+    in the order of data['A'].
+    '''
+
+    def __init__(self, data, persistent=False, timer=None, solver=None, options=None):
+        self.timer = timer if timer is not None else PhaseTimer()
+        self.arcs = data['A'][None]
+        with self.timer.phase('instance_creation'):
+            self.instance = rob_opt.model.create_instance({None: data})
+            self._init_solver(persistent, solver, options)
+        #the previous solution is the starting point of the next solve
+        self.warmstart = (not persistent and self.opt.available(exception_flag=False) and self.opt.warm_start_capable())
+
+    def add_upper_bound(self, value):
+        '''
+        Add the constraint objective <= {value}
+        '''
+        from pyomo.contrib.appsi.base import PersistentBase as AppsiPersistentSolver
+        con = self.instance.c.add(self.instance.OBJ.expr <= value)
+        if not self.persistent:
+            return
+        if isinstance(self.opt, AppsiPersistentSolver):
+            self.opt.add_constraints([con])
+        else:
+            apply_persistent_deltas(self.opt, new_constraints=[con])
+
+    def set_start(self, side, cut, destroyed):
+        '''
+        Starting solution: the attack destroying the arcs {destroyed} of the cut {cut}
+        ({side} is the source side of the cut)
+        '''
+        if not self.warmstart:
+            return
+        instance = self.instance
+        cut = set(cut)
+        destroyed = set(destroyed)
+        for v in instance.V:
+            instance.alpha[v].value = 0 if v in side else 1
+        for arc in instance.A:
+            instance.z[arc].value = 1 if arc in destroyed else 0
+            instance.beta[arc].value = 1 if (arc in cut and arc not in destroyed) else 0
+
+    def solve(self, gamma, y=None, time_limit=None):
+        '''
+        Solve with attacker budget {gamma} and fortification {y} (None to keep the
+        previous one), within {time_limit} seconds if given. Return (objective, z array),
+        the lower bound proved on the objective is kept in bound.
+        '''
+        instance = self.instance
+        getattr(instance, 'gamma')[None] = gamma
+        if y is not None:
+            for arc, value in zip(self.arcs, y):
+                getattr(instance, 'y')[arc] = float(value)
+        with self.timer.phase('solver_update'):
+            apply_persistent_deltas(self.opt, constraints_to_update=[instance.constraint_budget])
+        with self.timer.phase('optimality_solve'):
+            if self.warmstart:
+                results = self._run(time_limit, warmstart=True)
             else:
-                print("Error:", e)
-                break
+                results = self._run(time_limit)
+        with self.timer.phase('solution_loading'):
+            instance.solutions.load_from(results)
+            z = np.array([round(instance.z[arc].value or 0) for arc in self.arcs], dtype=int)
+        objective = instance.OBJ()
+        self.bound = self._bound(results, objective, 'lower_bound')
+        return objective, z
+
+
+class PyomoFortificationModel(_PyomoModel):
+    '''
+    Fortification model feasibility_robust.py with budget {F}, solved with the backend
+    {solver} and {options}, kept in the persistent solver if {persistent} is True.
+    One cut is added for each attack, only the arcs that appeared in an attack can
+    be fortified.
+    '''
+
+    def __init__(self, data, F, persistent=False, timer=None, solver=None, options=None):
+        self.timer = timer if timer is not None else PhaseTimer()
+        self.arcs = data['A'][None]
+        self.cost = data['cost']
+        self.F = F
+        with self.timer.phase('instance_creation'):
+            self.instance = rob_feas.model.create_instance({None: data})
+            getattr(self.instance, 'F')[None] = F
+            self._init_solver(persistent, solver, options, new_constraints=True, bound_changes=True)
+        self.cuts = 0
+
+    def add_cut(self, z):
+        '''
+        Add the cut of the attack {z}: sum over the destroyed arcs of (y + cost) >= tobj
+        '''
+        instance = self.instance
+        with self.timer.phase('cut_construction'):
+            destroyed = [arc for arc, value in zip(self.arcs, z) if value]
+            cut = sum(instance.y[arc] + self.cost[arc] for arc in destroyed) - instance.tobj
+            new_cut = instance.c.add(cut >= 0)
+
+            updated_vars = []
+            if self.cuts == 0:
+                #first cut: the arcs not attacked are fixed to 0
+                for arc, value in zip(self.arcs, z):
+                    if value:
+                        instance.y[arc].setub(None)
+                    else:
+                        instance.y[arc].setub(instance.y[arc].lb)  #lb==ub, fixed var
+                    updated_vars.append(instance.y[arc])
+            else:
+                for arc in destroyed:
+                    if instance.y[arc].ub is not None:
+                        instance.y[arc].setub(None)
+                        updated_vars.append(instance.y[arc])
+            self.cuts += 1
+        with self.timer.phase('solver_update'):
+            apply_persistent_deltas(self.opt, new_constraints=[new_cut], updated_vars=updated_vars)
+
+    def solve(self, time_limit=None):
+        '''
+        Solve within {time_limit} seconds if given, return (tobj, y array). The upper
+        bound proved on tobj is kept in bound.
+        '''
+        instance = self.instance
+        with self.timer.phase('feasibility_solve'):
+            results = self._run(time_limit)
+        with self.timer.phase('solution_loading'):
+            instance.solutions.load_from(results)
+            y = np.array([instance.y[arc].value or 0.0 for arc in self.arcs])
+        objective = instance.OBJ()
+        self.bound = self._bound(results, objective, 'upper_bound')
+        return objective, y
+
+
+def attack_model(data, persistent=False, timer=None, solver=None, options=None):
+    '''
+    Worst-case attack model of {data} (a single network, not in Pyomo format) built
+    with model_builder. The matrix models are always solved with HiGHS, only the
+    time limit and the MIP gap of {options} apply.
+    '''
+    if model_builder == 'matrix':
+        return matrix_models.AttackMILP(data, solver_backends.scipy_options(**solver_settings(solver, options)[1]), timer)
+    return PyomoAttackModel(data, persistent, timer, solver, options)
+
+
+def fortification_model(data, F, persistent=False, timer=None, solver=None, options=None):
+    '''
+    Fortification model of {data} with budget {F} built with model_builder
+    '''
+    if model_builder == 'matrix':
+        return matrix_models.FortificationLP(data, F, solver_backends.scipy_options(**solver_settings(solver, options)[1]), timer)
+    return PyomoFortificationModel(data, F, persistent, timer, solver, options)
 
 
 
@@ -88,21 +596,7 @@ def generate_input_data()->dict:
     dict: dictionary with informations like number of nodes, source, terminal, arcs, capacity, and cost to destroy an arc to be used as input when computing max flow.
 
     """
-    global nodes
-    global source
-    global terminal
-    global network_data
-    
-    data = {
-        'n': {None: int(nodes)},
-        's': {None: int(source)},
-        't': {None: int(terminal)},
-        'A': {None: [(network_data['node i'][i],network_data['node j'][i]) for i in range(len(network_data))] },
-        'capacity': {(network_data['node i'][i],network_data['node j'][i]):network_data['capacity'][i] for i in range(len(network_data))},
-        'cost': {(network_data['node i'][i],network_data['node j'][i]):network_data['cost'][i] for i in range(len(network_data))}
-            }
-    
-    return data
+    return get_default_session().generate_input_data()
 
 
 
@@ -119,8 +613,7 @@ def get_network() -> DataFrame:
         Each row represent an arc ('node i', 'node j'), with capacity 'capacity' and destruction cost 'cost'
         
     """
-    global network_data
-    return network_data 
+    return get_default_session().get_network()
 
 
 @tool 
@@ -128,8 +621,7 @@ def get_source() -> int:
     """
     Return the source node id of the network
     """
-    global source
-    return source
+    return get_default_session().get_source()
 
 
 @tool 
@@ -137,8 +629,7 @@ def get_terminal() -> str:
     """
     Return the terminal node id of the network
     """
-    global terminal
-    return terminal
+    return get_default_session().get_terminal()
 
 
 
@@ -149,19 +640,7 @@ def reset_values() -> None:
     
 
     """
-    global network_data
-    global nodes
-    global source
-    global terminal
-    global network_data_b
-    global nodes_b
-    global source_b
-    global terminal_b
-    
-    network_data=copy.deepcopy(network_data_b)
-    nodes=copy.deepcopy(nodes_b)
-    source=copy.deepcopy(source_b)
-    terminal=copy.deepcopy(terminal_b)     
+    get_default_session().reset_values()
 
 
   
@@ -176,16 +655,7 @@ def change_capacity(arcs: List[Tuple[int,int]], new_capacities: List[int])->None
     
    
     """
-    global network_data
-    
-    if len(arcs)==len(new_capacities):
-       for i in range(len(new_capacities)):
-           capacity=new_capacities[i]
-           if capacity>=0:
-               row=(network_data['node i']==arcs[i][0]) & (network_data['node j']==arcs[i][1])
-               if sum(row)==True:
-                #capacity can be updated
-                    network_data.loc[row,'capacity']=capacity
+    get_default_session().change_capacity(arcs, new_capacities)
 
 
 @tool
@@ -199,52 +669,200 @@ def change_cost(arcs: List[Tuple[int,int]], new_costs: List[int])->None:
     
    
     """
-    global network_data
+    get_default_session().change_cost(arcs, new_costs)
+
+
+@tool
+def update_arcs(arcs: List[Tuple[int,int]], new_capacities: Optional[List[float]] = None, new_costs: Optional[List[float]] = None)->None:
+    """
+    Function to change both the capacity and the cost of arcs on the global variable {network_data} in a single call. Each arc is updated only if it exists and the new value is >=0, otherwise simply do nothing without attempting to fix the problem.
     
-    if len(arcs)==len(new_costs):
-       for i in range(len(new_costs)):
-           cost=new_costs[i]
-           if cost>=0:
-               row=(network_data['node i']==arcs[i][0]) & (network_data['node j']==arcs[i][1])
-               if sum(row)==True:
-                #capacity can be updated
-                    network_data.loc[row,'cost']=cost
+    Args:
+        arcs: List of tuples of (int,int) that indicates arcs by their coordinates (i,j)
+        new_capacities: optional, new values of capacity of the arcs (same length as arcs)
+        new_costs: optional, new values of costs of the arcs (same length as arcs)
+    
+   
+    """
+    get_default_session().update_arcs(arcs, new_capacities, new_costs)
 
 
 
 @tool
-def compute_max_flow(data: dict) -> dict:
+def compute_max_flow(data: dict, backend: Optional[str] = None, solver: Optional[str] = None, solver_options: Optional[dict] = None, stats: Optional[bool] = False) -> dict:
     """
     Function to compute the max flow of the network
     
     Args:
         data: dictionary of data including number of nodes, source, terminal, arcs, and capacity. It can be generated by the @tool generate_data
+        backend: optional, 'native' to use the built-in max flow algorithm, 'pyomo' to solve the LP model with the solver (useful for cross-checking). If not given, the default backend is used
+        solver: optional, solver backend to use for this call: 'highs', 'gurobi', 'cplex', 'cbc', 'glpk' or 'scip'. If not given (or not installed), the default backend is used
+        solver_options: optional, solver options for this call, e.g. {'time_limit': 60, 'mip_gap': 0.01, 'threads': 4} (time limit in seconds, relative MIP gap, number of threads)
+        stats: optional, if True the statistics of the computation are added to the output under the key 'stats'
     
     Returns:
         dict: dictionary with 2 types of information. 1. arcs (i,j) and associated optimal flow (if non-zero). 2. the optimal flow value 'max_flow_value'
+        If {stats} is True, 'stats' is a dictionary with the time spent in each phase ('phase_times'), the total time, the number of LP solves ('optimality_iter'), the number of blocking flows of the native algorithm ('blocking_flows'), whether the flow of the previous call was repaired ('repaired') and the size of the LP instance ('variables', 'constraints'). If the result comes from the cache, 'stats' is {'cached': True}.
      
 
     """
+    return get_default_session().compute_max_flow(data, backend, solver, solver_options, stats)
+
+
+
+def max_flow_pyomo(data, solver=None, options=None, timer=None, counts=None):
+    '''
+    Max flow computed by solving the LP model max_flow.py with the backend {solver}
+    (or the same LP built as a sparse matrix, if model_builder is 'matrix'). The
+    phases are measured with {timer}, the number of solves and the size of the
+    instance are written in {counts} (if given)
+    '''
+    if timer is None:
+        timer = PhaseTimer()
+    if counts is None:
+        counts = dict()
+    with timer.phase('reduction'):
+        reduction = ReducedNetwork(data, prune=reduce_networks, series=reduce_networks, parallel=reduce_networks)
+    if len(reduction) == 0:
+        #no path from the source to the terminal
+        return {'max_flow_value': 0.0}
+    data = reduction.data
+
+    if model_builder == 'matrix':
+        value, flows = matrix_models.max_flow_lp(data, solver_backends.scipy_options(**solver_settings(solver, options)[1]), timer)
+        with timer.phase('solution_loading'):
+            flow_dict = {arc: flow for arc, flow in zip(data['A'][None], flows.tolist()) if flow > 0}
+            flow_dict = reduction.flows_back(flow_dict)
+        flow_dict['max_flow_value'] = value
+        #one variable per arc, one conservation row per node other than the source and the terminal
+        nodes = {v for arc in data['A'][None] for v in arc} - {data['s'][None], data['t'][None]}
+        counts.update({'optimality_iter': 1, 'variables': len(data['A'][None]), 'constraints': len(nodes)})
+        return flow_dict
+
     #Pyomo format
     data = {None: data}
     
-    max_flow_instance = maxflow_abstract.model.create_instance(data)
-    opt = SolverFactory(MILP_solver)
-    results_maxflow = opt.solve(max_flow_instance)
-    max_flow_instance.solutions.load_from(results_maxflow)
-    
-    flow_dict=dict()
-    for arc in max_flow_instance.A:
-        if max_flow_instance.f[arc].value>0:
-            #print([arc,max_flow_instance.f[arc].value])
-            flow_dict[arc] = max_flow_instance.f[arc].value
+    with timer.phase('instance_creation'):
+        max_flow_instance = maxflow_abstract.model.create_instance(data)
+        opt = solver_for(solver, options)
+    with timer.phase('optimality_solve'):
+        results_maxflow = opt.solve(max_flow_instance, load_solutions=False)
+    with timer.phase('solution_loading'):
+        max_flow_instance.solutions.load_from(results_maxflow)
+        
+        flow_dict=dict()
+        for arc in max_flow_instance.A:
+            if max_flow_instance.f[arc].value>0:
+                #print([arc,max_flow_instance.f[arc].value])
+                flow_dict[arc] = max_flow_instance.f[arc].value
+        flow_dict = reduction.flows_back(flow_dict)
     flow_dict['max_flow_value'] = max_flow_instance.OBJ()
+    counts.update({'optimality_iter': 1, 'variables': max_flow_instance.nvariables(), 'constraints': max_flow_instance.nconstraints()})
+    return flow_dict
+
+
+
+def _attack_result(data, objective, z):
+    flow_dict=dict()
+    arcs_destroyed=[]
+    tot_cost=0
+    for arc, value in zip(data['A'][None], z):
+        if value==1:
+            arcs_destroyed.append(arc)
+            tot_cost+=data['cost'][arc]
+    flow_dict['arcs_destroyed'] = arcs_destroyed
+    flow_dict['total_cost_attack'] = tot_cost
+    flow_dict['max_flow_value'] = objective
+    return flow_dict
+
+
+def _attack_reduction(data):
+    #the worst-case attack only depends on the arcs on source-terminal paths, and on the cheapest arc of each chain
+    reduction = ReducedNetwork(data, prune=reduce_networks, series=reduce_networks)
+    if len(reduction) == 0:
+        #no path from the source to the terminal, keep the network
+        reduction = ReducedNetwork(data, prune=False)
+    return reduction
+
+
+def _attack_back(reduction, flow_dict):
+    #attack on the original arcs from the attack on the reduced network
+    flow_dict = dict(flow_dict)
+    flow_dict['arcs_destroyed'] = reduction.arcs_back(flow_dict['arcs_destroyed'])
+    flow_dict['total_cost_attack'] = sum(reduction.original['cost'][arc] for arc in flow_dict['arcs_destroyed'])
+    return flow_dict
+
+
+def _greedy_cut_attack(cut, capacity, cost, attacker_budget):
+    '''
+    Destroy the arcs of {cut} with the largest capacity per unit of cost within the
+    budget, return (destroyed arcs, total cost, capacity of the cut left)
+    '''
+    destroyed = []
+    spent = 0
+    for arc in sorted(cut, key=lambda a: -capacity[a]/cost[a] if cost[a] > 0 else -np.inf):
+        if spent + cost[arc] <= attacker_budget + max_flow_native.EPS:
+            destroyed.append(arc)
+            spent += cost[arc]
+    remaining = sum(capacity[arc] for arc in cut) - sum(capacity[arc] for arc in destroyed)
+    return destroyed, spent, remaining
+
+
+def _attack_statistics(flow_dict, timer, model, stats):
+    #statistics of compute_worst_case_attack, {model} is None if the minimum cuts settled the instance
+    variables, constraints = model.size() if model is not None else (0, 0)
+    statistics = {
+        'phase_times': timer.times,
+        'total_time': timer.total(),
+        'optimality_iter': int(model is not None),
+        'settled_by_preprocessing': model is None,
+        'variables': variables,
+        'constraints': constraints,
+        }
+    if metrics_hook is not None:
+        metrics_hook('compute_worst_case_attack', statistics)
+    if stats:
+        flow_dict['stats'] = statistics
     return flow_dict
 
 
+def attack_preprocessing(data, attacker_budget):
+    '''
+    Cheap bounds on the worst-case attack from minimum cuts, computed with the native
+    max flow algorithm. Return (result, incumbent):
+        - result is the worst-case attack (same format as compute_worst_case_attack)
+          when the bounds settle the instance, None otherwise:
+          no flow, budget below the cheapest arc, budget covering the cheapest cut
+        - incumbent is the best attack found on the minimum capacity cut and on the
+          cheapest cut, as (source side of the cut, cut arcs, destroyed arcs, flow left)
+    '''
+    capacity, cost = data['capacity'], data['cost']
+    flow_network = max_flow_native.max_flow(data)
+    max_flow_value = float(flow_network.value)
+    if max_flow_value <= max_flow_native.EPS or attacker_budget < min(cost.values()):
+        #nothing to disrupt, or no arc can be destroyed
+        return {'arcs_destroyed': [], 'total_cost_attack': 0, 'max_flow_value': max_flow_value}, None
+
+    cost_network = max_flow_native.FlowNetwork(data['A'][None], cost, data['s'][None], data['t'][None])
+    cost_network.solve()
+    cheapest_side, cheapest_cut = cost_network.min_cut()
+    if cost_network.value <= attacker_budget + max_flow_native.EPS:
+        #the attacker can disconnect the terminal
+        return {'arcs_destroyed': cheapest_cut, 'total_cost_attack': sum(cost[arc] for arc in cheapest_cut), 'max_flow_value': 0.0}, None
+
+    incumbent = None
+    for side, cut in (flow_network.min_cut(), (cheapest_side, cheapest_cut)):
+        destroyed, spent, remaining = _greedy_cut_attack(cut, capacity, cost, attacker_budget)
+        if incumbent is None or remaining < incumbent[3]:
+            incumbent = (side, cut, destroyed, remaining)
+    if incumbent[3] <= max_flow_native.EPS:
+        destroyed = incumbent[2]
+        return {'arcs_destroyed': destroyed, 'total_cost_attack': sum(cost[arc] for arc in destroyed), 'max_flow_value': 0.0}, None
+    return None, incumbent
+
 
 @tool
-def compute_worst_case_attack(data: dict, attacker_budget: float) -> list:
+def compute_worst_case_attack(data: dict, attacker_budget: float, solver: Optional[str] = None, solver_options: Optional[dict] = None, stats: Optional[bool] = False) -> list:
     """
     Function to compute the worst case attack on the network.
     
@@ -252,41 +870,159 @@ def compute_worst_case_attack(data: dict, attacker_budget: float) -> list:
         data: dictionary of data including number of nodes, source, terminal, arcs,
         capacity, and cost to destroy arcs. It can be generated by the @tool generate_data
         attacker_budget: budget available to the attacker to destroy arcs
+        solver: optional, solver backend to use for this call: 'highs', 'gurobi', 'cplex', 'cbc', 'glpk' or 'scip'. If not given (or not installed), the default backend is used
+        solver_options: optional, solver options for this call, e.g. {'time_limit': 60, 'mip_gap': 0.01, 'threads': 4} (time limit in seconds, relative MIP gap, number of threads)
+        stats: optional, if True the statistics of the computation are added to the output under the key 'stats'
         
     Returns:
         dict: dictionary with 3 types of information. 
         1. Arcs (i,j) destroyed. 
         2. Total cost of the attack. 
         3. The optimal flow value 'max_flow_value' on the disrupted network
+        If {stats} is True, 'stats' is a dictionary with the time spent in each phase ('phase_times'), the total time, the number of attack problems solved ('optimality_iter'), whether the minimum cuts settled the instance without solving it ('settled_by_preprocessing') and the size of the instance ('variables', 'constraints'). If the result comes from the cache, 'stats' is {'cached': True}.
      
     """
-    #Pyomo format
-    data = {None: data}
+    solver, options = solver_settings(solver, solver_options)
+    key = result_cache.key('compute_worst_case_attack', data, attacker_budget, solver, options)
+    flow_dict = result_cache.get(key)
+    if flow_dict is not None:
+        if stats:
+            flow_dict['stats'] = {'cached': True}
+        return flow_dict
+
+    timer = PhaseTimer()
+    with timer.phase('reduction'):
+        reduction = _attack_reduction(data)
+    data = reduction.data
+
+    #easy cases are settled by the minimum cuts
+    with timer.phase('preprocessing'):
+        flow_dict, incumbent = attack_preprocessing(data, attacker_budget)
+    if flow_dict is not None:
+        flow_dict = _attack_back(reduction, flow_dict)
+        result_cache.put(key, flow_dict)
+        return _attack_statistics(flow_dict, timer, None, stats)
+
+    worst_case_attack = attack_model(data, timer=timer, solver=solver, options=options)
     
-    worst_case_attack_instance = rob_opt.model.create_instance(data)
-    opt = SolverFactory(MILP_solver)
-    getattr(worst_case_attack_instance, 'gamma')[None] = attacker_budget
+    #the best attack found on a minimum cut bounds the worst-case flow, and is the warm start
+    side, cut, destroyed, remaining = incumbent
+    worst_case_attack.add_upper_bound(remaining)
+    worst_case_attack.set_start(side, cut, destroyed)
     
+    objective, z = worst_case_attack.solve(attacker_budget)
+    flow_dict = _attack_back(reduction, _attack_result(data, objective, z))
+    result_cache.put(key, flow_dict)
+    return _attack_statistics(flow_dict, timer, worst_case_attack, stats)
+
+
+
+def attack_cost_levels(costs, max_levels=10**6):
+    '''
+    Sorted list of the total costs of all the possible attacks (subset sums of the
+    destruction costs). The worst-case attack can only change when the attacker
+    budget crosses one of these values. Return None if the costs are not on a common
+    decimal grid or if there are more than {max_levels} candidate values.
+    '''
+    for digits in range(7):
+        scale = 10**digits
+        scaled = [int(round(c * scale)) for c in costs]
+        if all(abs(c * scale - k) < 1e-6 for c, k in zip(costs, scaled)):
+            break
+    else:
+        return None
+    if sum(scaled) > max_levels:
+        return None
+
+    #bit k of reachable is set if k/scale is the cost of an attack
+    reachable = 1
+    for k in scaled:
+        reachable |= reachable << k
+    bits = bin(reachable)[:1:-1]
+    return [k / scale for k, bit in enumerate(bits) if bit == '1']
+
+
+@tool
+def compute_worst_case_attack_sweep(data: dict, attacker_budgets: List[float], solver: Optional[str] = None, solver_options: Optional[dict] = None) -> list:
+    """
+    Function to compute the worst case attack on the network for several attacker budgets, e.g. to draw the curve of the max flow after the attack as a function of the attacker budget.
     
-    results_worst_case = opt.solve(worst_case_attack_instance)
-    worst_case_attack_instance.solutions.load_from(results_worst_case)
-    flow_dict=dict()
-    arcs_destroyed=[]
-    tot_cost=0
-    for arc in worst_case_attack_instance.A:
-        if worst_case_attack_instance.z[arc].value==1:
-            arcs_destroyed.append(arc)
-            tot_cost+=worst_case_attack_instance.cost[arc]
-    flow_dict['arcs_destroyed'] = arcs_destroyed
-    flow_dict['total_cost_attack'] = tot_cost
-    flow_dict['max_flow_value'] = worst_case_attack_instance.OBJ()
-    return flow_dict
+    Args:
+        data: dictionary of data including number of nodes, source, terminal, arcs,
+        capacity, and cost to destroy arcs. It can be generated by the @tool generate_data
+        attacker_budgets: list of budgets available to the attacker to destroy arcs
+        solver: optional, solver backend to use for this call: 'highs', 'gurobi', 'cplex', 'cbc', 'glpk' or 'scip'. If not given (or not installed), the default backend is used
+        solver_options: optional, solver options for this call, e.g. {'time_limit': 60, 'mip_gap': 0.01, 'threads': 4} (time limit in seconds, relative MIP gap, number of threads)
+        
+    Returns:
+        list: list of dictionaries, one per attacker budget sorted in increasing order, with 4 types of information. 
+        1. The attacker budget 'attacker_budget'. 
+        2. Arcs (i,j) destroyed. 
+        3. Total cost of the attack. 
+        4. The optimal flow value 'max_flow_value' on the disrupted network
+     
+    """
+    budgets = sorted(attacker_budgets)
+    reduction = _attack_reduction(data)
+    data = reduction.data
+    levels = attack_cost_levels(list(data['cost'].values()))
+
+    #a single instance is solved for all the budgets, the previous optimal attack is the warm start of the next solve
+    worst_case_attack = attack_model(data, solver=solver, options=solver_options)
+    
+    sweep = []
+    last_result = None
+    last_level = None
+    for attacker_budget in budgets:
+        if levels is not None:
+            #the attack only depends on the largest attack cost within the budget
+            level = levels[bisect_right(levels, attacker_budget + 1e-9) - 1]
+        else:
+            level = attacker_budget
+        
+        if last_result is not None and (level == last_level or last_result['max_flow_value'] == 0):
+            #same answer as the previous budget
+            flow_dict = dict(last_result)
+        else:
+            if last_result is not None:
+                #the worst-case flow cannot increase with the budget
+                worst_case_attack.add_upper_bound(last_result['max_flow_value'])
+            objective, z = worst_case_attack.solve(attacker_budget)
+            flow_dict = _attack_result(data, objective, z)
+        
+        last_result = flow_dict
+        last_level = level
+        flow_dict = _attack_back(reduction, flow_dict)
+        flow_dict['attacker_budget'] = attacker_budget
+        sweep.append(flow_dict)
+    return sweep
 
 
   
 
+def grid_below(value, step):
+    '''
+    Largest multiple of {step} strictly below {value}, ignoring the round-off of the
+    solvers (e.g. 49.800000000000004 is taken as 49.8)
+    '''
+    return float(np.round((np.ceil(np.round(value / step, 6)) - 1) * step, 10))
+
+
+def resilience_steps(tolerance, width, adaptive=True):
+    '''
+    Steps of the grids of the gamma values tried by compute_resilience, from the
+    coarsest to {tolerance}. With {adaptive}, the steps are 10, 100, ... times the
+    tolerance, up to a tenth of the {width} of the initial interval.
+    '''
+    steps = [tolerance]
+    if adaptive:
+        while steps[-1] * 10 <= width / 10:
+            steps.append(steps[-1] * 10)
+    return steps[::-1]
+
+
 @tool
-def compute_resilience(data: dict, F: float, d: float) -> dict:
+def compute_resilience(data: dict, F: float, d: float, persistent: Optional[bool] = False, stats: Optional[bool] = False, solver: Optional[str] = None, solver_options: Optional[dict] = None, time_budget: Optional[float] = None, max_iterations: Optional[int] = None, tolerance: Optional[float] = None, relative_tolerance: Optional[float] = None, adaptive: Optional[bool] = None) -> dict:
     """
     Function to compute the resilience of the network, i.e., the maximum attack budget for which fortified network, after the worst-case attack, can guarantee a flow of at least {d}, and the associated fortification. The fortified network is obtained by optimally assign the {F} units of fortification budget to arcs to increase the cost of disruption.
     
@@ -294,150 +1030,303 @@ def compute_resilience(data: dict, F: float, d: float) -> dict:
         data: dictionary of data including number of nodes, source, terminal, arcs, capacity, and cost to destroy arcs. It can be generated by the @tool generate_data
         F: fortification budget available to the defender to make the network more resilient
         d: minimum level of flow to be guarateed after the worst-case attack
+        persistent: optional, if True the optimality and feasibility models are kept loaded in an in-process solver and only the changes are sent at each iteration (faster for large networks)
+        stats: optional, if True the statistics of the computation are added to the output under the key 'stats'
+        solver: optional, solver backend to use for this call: 'highs', 'gurobi', 'cplex', 'cbc', 'glpk' or 'scip'. If not given (or not installed), the default backend is used
+        solver_options: optional, solver options for this call, e.g. {'time_limit': 60, 'mip_gap': 0.01, 'threads': 4} (time limit in seconds, relative MIP gap, number of threads)
+        time_budget: optional, maximum wall-clock time in seconds. If given (or if max_iterations is given), the computation stops when the budget is spent and returns the best bounds found so far (anytime mode)
+        max_iterations: optional, maximum number of worst-case attack problems to solve (anytime mode)
+        tolerance: optional, absolute precision of the resilience (default 0.1): gamma is a multiple of the tolerance, and the resilience is below gamma + tolerance
+        relative_tolerance: optional, relative precision of the resilience, e.g. 0.01 to stop when the precision is within 1% of gamma (useful with large costs), the absolute tolerance still applies as the finest precision
+        adaptive: optional, if True (default) the resilience is first bracketed with coarse steps, which are refined only near convergence; if False every step is the tolerance
         
     Returns:
-        dict: dictionary with 2 types of information. 1. gamma, i.e., the resilience of the network, that is the maximum attacker's budget for which, after fortification, in the worst-case attack the max flow can be guaranteed to be at least {d}. Refer to this as "resilience". 2. The fortification, i.e., a dictionary with the assignment of the fortification budget {F} to arcs (i,j). 
+        dict: dictionary with 3 types of information. 1. gamma, i.e., the resilience of the network, that is the maximum attacker's budget for which, after fortification, in the worst-case attack the max flow can be guaranteed to be at least {d}. Refer to this as "resilience". 2. The fortification, i.e., a dictionary with the assignment of the fortification budget {F} to arcs (i,j). 3. The precision achieved 'precision': the resilience is between gamma and gamma + precision.
+        If {stats} is True, 'stats' is a dictionary with the time spent in each phase ('phase_times': reduction of the network, instance creation, optimality and feasibility solves, solution loading, cut construction, solver updates), the total time, the number of optimality and feasibility problems solved, the number of cuts, the size of the two instances ('variables', 'constraints') and the sequence of gamma values tried ('gamma_trajectory'). If the result comes from the cache, 'stats' is {'cached': True}.
+        In anytime mode (time_budget or max_iterations given), the output also has 'gamma_lower' and 'gamma_upper' (the resilience is at least gamma_lower and below gamma_upper) and 'converged'. If the budget ran out before convergence, 'converged' is False, gamma is gamma_lower and the fortification is the best one found so far.
+        If the max flow of the network is below {d} even without attack, no attack budget is withstood: 'feasible' is False, gamma and precision are None and 'message' explains why.
      
 
     """
-    data = {None: data}
+    solver, options = solver_settings(solver, solver_options)
+    if time_budget is None:
+        time_budget = resilience_time_budget
+    if tolerance is None:
+        tolerance = resilience_tolerance
+    if adaptive is None:
+        adaptive = resilience_adaptive
+    if tolerance <= 0 or (relative_tolerance is not None and relative_tolerance <= 0):
+        raise ValueError('the tolerances must be positive')
+    anytime = time_budget is not None or max_iterations is not None
+    precision_settings = (tolerance, relative_tolerance, adaptive)
+    if anytime:
+        key = result_cache.key('compute_resilience', data, F, d, solver, options, precision_settings, time_budget, max_iterations)
+    else:
+        key = result_cache.key('compute_resilience', data, F, d, solver, options, precision_settings)
+    output_vec = result_cache.get(key)
+    if output_vec is not None:
+        if stats:
+            output_vec['stats'] = {'cached': True}
+        return output_vec
+
+    timer = PhaseTimer()
+    deadline = None if time_budget is None else timer.start + time_budget
+
+    def time_left():
+        #time limit of the next solve: the time limit of the solver, within the time budget
+        if deadline is None:
+            return None
+        left = max(deadline - time.perf_counter(), 0.0)
+        return left if options.get('time_limit') is None else min(left, options['time_limit'])
+
+    def budget_spent():
+        if max_iterations is not None and optimality_iter >= max_iterations:
+            return 'max_iterations'
+        if deadline is not None and time.perf_counter() >= deadline:
+            return 'time_budget'
+        return None
+
+    #round-off of the solvers on the flow left by the attack: an attack leaving exactly d
+    #(e.g. 11.999999999 for 12) does not go below d
+    d_tol = d - 1e-6 * max(1.0, abs(d))
+
+    #flow below d even without attack: no attack budget is withstood, there is no resilience
+    max_flow_value = max_flow_native.max_flow(data).value
+    if max_flow_value < d_tol:
+        output_vec = {
+            'gamma': None,
+            'precision': None,
+            'fortification': dict(),
+            'feasible': False,
+            'message': f'the max flow of the network ({max_flow_value}) is below d={d}, even without attack',
+            }
+        if anytime:
+            output_vec.update({'gamma_lower': None, 'gamma_upper': None, 'converged': True})
+        if stats:
+            output_vec['stats'] = {'phase_times': timer.times, 'total_time': timer.total(), 'optimality_iter': 0,
+                                   'feasibility_iter': 0, 'cuts': 0, 'variables': 0, 'constraints': 0, 'gamma_trajectory': [],
+                                   'persistent': bool(persistent), 'stopped': None}
+        return output_vec
+
+    #only the dead arcs are removed: the fortification has to cover every arc of a chain,
+    #the fortification of the remaining arcs is the fortification of the original network
+    with timer.phase('reduction'):
+        reduction = ReducedNetwork(data, prune=reduce_networks)
+        if len(reduction) == 0:
+            reduction = ReducedNetwork(data, prune=False)
+    data = reduction.data
 
 
     #initialize models for optimality and feasibility
-    opt = SolverFactory(MILP_solver)
-    
-    rob_opt_inst = rob_opt.model.create_instance(data)
+    #gamma and y are parameters of the optimality model, the feasibility model gets a
+    #new cut and new bounds on y at every iteration (only these deltas are sent to the
+    #solver in persistent mode)
+    worst_case_attack = attack_model(data, persistent, timer, solver, options)
+    fortification = fortification_model(data, F, persistent, timer, solver, options)
 
-    #tolerance for the resilience value
-    epsilon_cost=0.1
+    #define Lower Bound L and Upper Bound U (on the grid of the tolerance)
     
-    #set the glpk solver
-    feas = SolverFactory(MILP_solver)
+    costs= list(data['cost'].values())
     
-
-    #define Lower Bound L and Upper Bound U
-    
-    costs= list(data[None]['cost'].values())
-    
-
-    invprecis = (1/epsilon_cost)
-    L=float(np.ceil(min(costs)*invprecis)/invprecis) - epsilon_cost
+    L = grid_below(min(costs), tolerance)
     
     sum_costs = np.sum(costs)
-    U = float(np.ceil((F + sum_costs)*invprecis)/invprecis)
+    U = float(np.round(np.ceil(np.round((F + sum_costs) / tolerance, 6)) * tolerance, 10))
     
     
-    #best fortification plan: dictionary (i,j) key, y value = value
-    best_fortification = dict()
-    for (i, j) in rob_opt_inst.A:
-        best_fortification[(i,j)] = 0
+    #fortification plan of the current attack (y of the arcs, in the order of data['A'])
+    #and best fortification plan
+    y = np.zeros(len(costs))
+    best_fortification = np.zeros(len(costs))
 
-    #iteration = 0  #number of bisection iterations
     optimality_iter = 0 #number of optimality problems solved
     feasibility_iter = 0 #number of feasibility problems solved
+    cuts = 0 #number of cuts added to the feasibility problem
+    gamma_trajectory = [] #values of gamma tried
+
+    #the resilience is bracketed by lower (a budget the fortification resists to) and upper
+    #(the feasibility problem: every fortification leaves an attack of cost tobj going below d).
+    #gamma is tried on the grid of the current step, just below upper: a failed attack adds
+    #a cut and lowers upper, a resisted attack raises lower. When no value of the grid is
+    #left between the bounds, the step is refined, down to the tolerance.
+    lower = L
+    upper = U
+    steps = resilience_steps(tolerance, U - L, adaptive)
+    level = 0
+
+    #certified bounds on the resilience: with a budget below the cheapest arc nothing can be
+    #destroyed, all the arcs (fortified) cost at most U; the bounds improve when a solve proves
+    #that an attack cannot go below d (lower) or that every fortification leaves an attack
+    #of cost tobj going below d (upper)
+    gamma_lower = L
+    gamma_upper = U
+    stopped = None #budget that stopped the computation before convergence
 
+    while True:
 
-    rob_feas_inst = rob_feas.model.create_instance(data)           
-    getattr(rob_feas_inst, 'F')[None] = F
-
-    gamma = U
-
-    exit = False  #try new value of gamma
-
-    while exit == False:
-
-        getattr(rob_opt_inst, 'gamma')[None] = gamma
-
-        results_o = opt.solve(rob_opt_inst)
-        rob_opt_inst.solutions.load_from(results_o)
-
-
-        #save the optimal solution
-        optimal_sol_o = rob_opt_inst.OBJ()
+        step = steps[level]
+        gamma = grid_below(upper, step)
+        if gamma <= lower:
+            #bracket closed at this step
+            if level == len(steps) - 1 or (relative_tolerance is not None and step <= relative_tolerance * abs(lower)):
+                break
+            level = level + 1
+            continue
 
-        if optimal_sol_o >= d:
+        stopped = budget_spent()
+        if stopped is not None:
+            break
+        gamma_trajectory.append(gamma)
+        try:
+            optimal_sol_o, z = worst_case_attack.solve(gamma, y, time_limit=time_left())
+        except solver_backends.SolverLimitReached:
+            stopped = 'solver_limit'
+            break
+        optimality_iter = optimality_iter + 1
 
-            #L = gamma
-            exit = True
+        if optimal_sol_o >= d_tol:
 
-            for (i, j) in rob_opt_inst.A:
-                best_fortification[(i,j)] = getattr(rob_opt_inst, 'y')[i,j].value
+            lower = gamma
+            best_fortification = y
+            if worst_case_attack.bound >= d_tol:
+                gamma_lower = max(gamma_lower, gamma)
 
         else:
             
-            cut=0 
-            for (i,j) in rob_opt_inst.z:
-                cut = cut + rob_opt_inst.z[i,j].value * (rob_feas_inst.y[i,j] + getattr(rob_opt_inst, 'cost')[i,j])
-            cut = cut - rob_feas_inst.tobj
-            
-            rob_feas_inst.c.add(cut >= 0)
-            
-            for (i,j) in rob_opt_inst.z:
-                if rob_feas_inst.y[i,j].ub == F: #first iteration
-                    if rob_opt_inst.z[i,j].value == 0.0:
-                        rob_feas_inst.y[i,j].setub(rob_feas_inst.y[i,j].lb)  #lb==ub, fixed var
-                    else:
-                        rob_feas_inst.y[i,j].setub(None)
-                else: #not first iteration
-                    if rob_opt_inst.z[i,j].value == 1.0:
-                        rob_feas_inst.y[i,j].setub(None)
+            fortification.add_cut(z)
+            cuts = cuts + 1
 
             #solve f model
-        
-            results_f = feas.solve(rob_feas_inst)
-            
+            try:
+                optimal_sol_f, y_f = fortification.solve(time_limit=time_left())
+            except solver_backends.SolverLimitReached:
+                stopped = 'solver_limit'
+                break
             feasibility_iter = feasibility_iter + 1
-            rob_feas_inst.solutions.load_from(results_f)
-
-            #save the feasibility solution
-            optimal_sol_f = rob_feas_inst.OBJ()
-
-                 
-            if float(np.ceil(optimal_sol_f*invprecis)/invprecis)-epsilon_cost <= L:
-                
-                #U = gamma
-                exit = True
-
-            else:
-                # change bounds for next optimality problem solution
-                for (i, j) in rob_opt_inst.A:
-                    getattr(rob_opt_inst, 'y')[i,j] = rob_feas_inst.y[i,j]
-                gamma = max(L,float(np.ceil(optimal_sol_f*invprecis)/invprecis)-epsilon_cost)
-
-    
-    rob_opt_inst = rob_opt.model.create_instance(data)
-    for (i, j) in rob_opt_inst.A:
-        getattr(rob_opt_inst, 'y')[i, j] = best_fortification[i, j]
-    getattr(rob_opt_inst, 'gamma')[None] = gamma + epsilon_cost
-    
+            gamma_upper = min(gamma_upper, fortification.bound)
 
-    results_o = opt.solve(rob_opt_inst)
-    rob_opt_inst.solutions.load_from(results_o)
-    optimal_sol_o = rob_opt_inst.OBJ()
+            # change bounds for next optimality problem solution
+            upper = min(upper, optimal_sol_f)
+            y = y_f
 
-    if optimal_sol_o >= d:
-        gamma = gamma + epsilon_cost
+    gamma = lower
+    precision = upper - lower
+    if stopped is not None:
+        #best bounds and fortification found so far (the fortification of the last
+        #feasibility problem resists to all the attacks found)
+        gamma = gamma_lower
+        precision = gamma_upper - gamma_lower
+        best_fortification = y
 
     y_plan = dict()
-    for edge in best_fortification:
-        if best_fortification[edge] > 0.0:
-            y_plan[edge] =  best_fortification[edge]
+    for edge, value in zip(data['A'][None], best_fortification.tolist()):
+        if value > 0.0:
+            y_plan[edge] = value
 
     output_vec=dict()
-    output_vec['gamma']=np.round(gamma, decimals=int(-np.log10(epsilon_cost)))
-    output_vec['fortification']=y_plan
+    output_vec['gamma']=np.round(gamma, decimals=10)
+    #the resilience is between gamma and gamma + precision
+    output_vec['precision'] = float(np.round(max(precision, 0.0), 10))
+    output_vec['fortification']=reduction.values_back(y_plan)
+    if anytime:
+        output_vec['gamma_lower'] = round(float(gamma_lower), 6)
+        output_vec['gamma_upper'] = round(float(gamma_upper), 6)
+        output_vec['converged'] = stopped is None
+    if stopped is None:
+        result_cache.put(key, output_vec)
+
+    statistics = {
+        'phase_times': timer.times,
+        'total_time': timer.total(),
+        'optimality_iter': optimality_iter,
+        'feasibility_iter': feasibility_iter,
+        'cuts': cuts,
+        'variables': worst_case_attack.size()[0] + fortification.size()[0],
+        'constraints': worst_case_attack.size()[1] + fortification.size()[1],
+        'gamma_trajectory': gamma_trajectory,
+        'persistent': bool(persistent),
+        'gamma_lower': gamma_lower,
+        'gamma_upper': gamma_upper,
+        'stopped': stopped,
+        }
+    if metrics_hook is not None:
+        metrics_hook('compute_resilience', statistics)
+    if stats:
+        output_vec['stats'] = statistics
         
     return output_vec
 
 
 
 
-model = OpenAIServerModel(
-    model_id="gemini-2.0-flash",
-    #temperature=0,
-    api_base="https://generativelanguage.googleapis.com/v1beta/openai",
-    api_key=GOOGLE_API_KEY,
-)
+#data shared by the worker processes of compute_resilience_sweep, sent once per worker
+_sweep_data = None
+
+#settings of this module copied to the worker processes: they are started with spawn (a fork of a
+#threaded process could inherit locks held by other threads, e.g. the one of result_cache) and
+#import the module afresh
+sweep_settings = ['solver_backend', 'solver_options', 'max_flow_backend', 'reduce_networks', 'model_builder',
+                  'resilience_tolerance', 'resilience_adaptive', 'resilience_time_budget']
+
+def _init_sweep_worker(data, settings):
+    global _sweep_data
+    _sweep_data = data
+    globals().update(settings)
+
+
+def _sweep_worker(args):
+    F, d, persistent, solver, solver_options, time_budget = args
+    return compute_resilience(_sweep_data, F, d, persistent, solver=solver, solver_options=solver_options, time_budget=time_budget)
+
+
+@tool
+def compute_resilience_sweep(data: dict, F_values: List[float], d_values: List[float], max_workers: Optional[int] = None, persistent: Optional[bool] = False, solver: Optional[str] = None, solver_options: Optional[dict] = None, time_budget: Optional[float] = None) -> DataFrame:
+    """
+    Function to compute the resilience of the network for every combination of fortification budget in {F_values} and minimum flow in {d_values}. The computations run in parallel on several processes.
+    
+    Args:
+        data: dictionary of data including number of nodes, source, terminal, arcs, capacity, and cost to destroy arcs. It can be generated by the @tool generate_data
+        F_values: list of fortification budgets available to the defender
+        d_values: list of minimum levels of flow to be guaranteed after the worst-case attack
+        max_workers: optional, number of processes to use. If not given, all the available cores are used
+        persistent: optional, if True each resilience computation uses the persistent solver mode of @tool compute_resilience
+        solver: optional, solver backend to use for this call: 'highs', 'gurobi', 'cplex', 'cbc', 'glpk' or 'scip'. If not given (or not installed), the default backend is used
+        solver_options: optional, solver options for this call, e.g. {'time_limit': 60, 'mip_gap': 0.01, 'threads': 4} (time limit in seconds, relative MIP gap, number of threads)
+        time_budget: optional, maximum wall-clock time in seconds of each resilience computation (anytime mode of @tool compute_resilience)
+        
+    Returns:
+        DataFrame: table with one row per pair (F, d) and columns 'F', 'd', 'gamma' (the resilience) and 'fortification' (dictionary with the assignment of the fortification budget F to arcs (i,j)). In anytime mode, the columns 'gamma_lower', 'gamma_upper' and 'converged' are added.
+    """
+    grid = list(product(F_values, d_values))
+    
+    settings = {name: globals()[name] for name in sweep_settings}
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context('spawn'),
+                             initializer=_init_sweep_worker, initargs=(data, settings)) as executor:
+        results = list(executor.map(_sweep_worker, [(F, d, persistent, solver, solver_options, time_budget) for (F, d) in grid]))
+    
+    table = pd.DataFrame({
+        'F': [F for (F, d) in grid],
+        'd': [d for (F, d) in grid],
+        'gamma': [r['gamma'] for r in results],
+        'fortification': [r['fortification'] for r in results],
+        })
+    if all('converged' in r for r in results):
+        for column in ('gamma_lower', 'gamma_upper', 'converged'):
+            table[column] = [r[column] for r in results]
+    return table
+
+
+
+
+#LLM client, created at the first use (nirad_utils.model)
+@functools.lru_cache(maxsize=None)
+def get_model():
+    return OpenAIServerModel(
+        model_id="gemini-2.0-flash",
+        #temperature=0,
+        api_base="https://generativelanguage.googleapis.com/v1beta/openai",
+        api_key=GOOGLE_API_KEY,
+    )
 
 
 
@@ -0,0 +1,122 @@
+'''author__ = 'Alberto Costa'
+   mail = 'noobsajbot@gmail.com'
+   date = '18 Oct 2026'
+
+   history of the conversation sent to the agent, kept within a token budget
+'''
+
+from collections import OrderedDict
+
+
+def estimate_tokens(text):
+    #about 4 characters per token for English text, numbers and code
+    return len(text) // 4 + 1
+
+
+def _shorten(text, chars):
+    text = ' '.join(str(text).split())
+    return text if len(text) <= chars else text[:chars] + '...'
+
+
+class PromptHistory:
+    '''
+    Prompt of the agent: the fixed {preamble} (instructions and examples) followed
+    by the turns of the conversation (User Query / Answer), kept within {max_tokens}:
+        - bulky answers (tables, flow dictionaries, long lists or texts) are replaced
+          by a compact version with a reference to the full output (see output)
+        - when the budget is exceeded, the oldest turns (but the last {keep_turns})
+          are reduced to a one-line summary, and the oldest summary lines are dropped
+    Tokens are counted with {count_tokens} (an estimate by default).
+    '''
+
+    def __init__(self, preamble, max_tokens=12000, keep_turns=3, max_answer_tokens=300,
+                 max_outputs=50, count_tokens=estimate_tokens):
+        self.preamble = preamble
+        self.max_tokens = max_tokens
+        self.keep_turns = keep_turns
+        self.max_answer_tokens = max_answer_tokens
+        self.max_outputs = max_outputs
+        self.count_tokens = count_tokens
+        self.turns = [] #[query, compact answer]
+        self.summary = [] #one line per old turn
+        self.outputs = OrderedDict() #reference number -> full output
+        self.references = 0
+
+    def _store(self, answer):
+        self.references += 1
+        self.outputs[self.references] = answer
+        while len(self.outputs) > self.max_outputs:
+            self.outputs.popitem(last=False)
+        return self.references
+
+    def output(self, reference):
+        '''
+        Full output replaced by the reference #{reference}, None if no longer kept
+        '''
+        return self.outputs.get(reference)
+
+    def compact(self, answer):
+        '''
+        Text of {answer} for the prompt, bulky outputs are replaced by a summary
+        and a reference
+        '''
+        text = answer.to_string() if hasattr(answer, 'to_string') else str(answer)
+        if self.count_tokens(text) <= self.max_answer_tokens:
+            return text
+        k = self._store(answer)
+        if hasattr(answer, 'columns') and hasattr(answer, 'shape'):
+            return f'[output #{k}: table with {answer.shape[0]} rows and columns {list(answer.columns)}]'
+        if isinstance(answer, dict):
+            #keep the values with a name (e.g. max_flow_value, gamma), count the others (e.g. arc flows)
+            named = {key: value for key, value in answer.items()
+                     if isinstance(key, str) and not isinstance(value, (dict, list, tuple))}
+            return f'{named} [output #{k}: {len(answer) - len(named)} more entries, e.g. values per arc]'
+        if isinstance(answer, (list, tuple)) and len(answer) > 0:
+            return f'[output #{k}: list of {len(answer)} items, the first is {_shorten(answer[0], 200)}]'
+        return text[:4 * self.max_answer_tokens] + f' ... [output #{k}: answer truncated]'
+
+    def add_query(self, query):
+        self.turns.append([query, None])
+
+    def add_answer(self, answer):
+        if not self.turns or self.turns[-1][1] is not None:
+            self.turns.append(['', None])
+        self.turns[-1][1] = self.compact(answer)
+        self._fit()
+
+    def add_turn(self, query, answer):
+        self.add_query(query)
+        self.add_answer(answer)
+
+    @staticmethod
+    def _turn_text(turn):
+        query, answer = turn
+        text = f'\n User Query: {query}'
+        if answer is not None:
+            text += f'\n Answer: {answer}'
+        return text
+
+    def prompt(self):
+        '''
+        Prompt to send to the agent
+        '''
+        parts = [self.preamble]
+        if self.summary:
+            parts.append('\n Earlier in this session (summary):\n' + '\n'.join(self.summary))
+        parts.extend(self._turn_text(turn) for turn in self.turns)
+        return ''.join(parts)
+
+    def tokens(self):
+        return self.count_tokens(self.prompt())
+
+    def _fit(self):
+        while self.tokens() > self.max_tokens and len(self.turns) > self.keep_turns:
+            query, answer = self.turns.pop(0)
+            self.summary.append(f' - {_shorten(query, 150)} -> {_shorten(answer, 150)}')
+        while self.tokens() > self.max_tokens and self.summary:
+            self.summary.pop(0)
+
+    def clear(self):
+        self.turns.clear()
+        self.summary.clear()
+        self.outputs.clear()
@@ -0,0 +1,100 @@
+'''author__ = 'Alberto Costa'
+   mail = 'noobsajbot@gmail.com'
+   date = '18 Oct 2026'
+
+   cache of the results of the NIRAD tools (max flow, worst-case attack, resilience)
+'''
+
+import copy
+import hashlib
+import os
+import pickle
+import threading
+from collections import OrderedDict
+
+
+def fingerprint(data):
+    '''
+    Content hash of a data dictionary (as generated by generate_input_data)
+    '''
+    h = hashlib.sha256()
+    for key in sorted(data):
+        h.update(repr(key).encode())
+        value = data[key]
+        if isinstance(value, dict):
+            h.update(repr(list(value.items())).encode())
+        else:
+            h.update(repr(value).encode())
+    return h.hexdigest()
+
+
+class ResultCache:
+    '''
+    Bounded LRU cache of tool results. Entries are keyed by the tool name, the
+    fingerprint of the network data and the parameters of the call, so a cached
+    result is never returned for a different network. If {persist_dir} is given,
+    results are also written there and survive the session.
+    '''
+
+    def __init__(self, max_entries=128, persist_dir=None):
+        self.max_entries = max_entries
+        self.persist_dir = persist_dir
+        self.entries = OrderedDict()
+        self.lock = threading.Lock() #the cache is shared by the sessions of the GUI
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, tool_name, data, *params):
+        '''
+        Key of the result of {tool_name} on {data} (data dictionary, or its fingerprint
+        if already computed) with the parameters {params}
+        '''
+        data_fingerprint = data if isinstance(data, str) else fingerprint(data)
+        return hashlib.sha256(repr((tool_name, data_fingerprint, params)).encode()).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.persist_dir, key + '.pkl')
+
+    def get(self, key):
+        '''
+        Return a copy of the cached result, None if not cached
+        '''
+        with self.lock:
+            result = self.entries.get(key)
+            if result is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return copy.deepcopy(result)
+        if self.persist_dir is not None and os.path.exists(self._path(key)):
+            with open(self._path(key), 'rb') as f:
+                result = pickle.load(f)
+            self._store(key, result)
+            with self.lock:
+                self.hits += 1
+            return copy.deepcopy(result)
+        with self.lock:
+            self.misses += 1
+        return None
+
+    def put(self, key, result):
+        self._store(key, copy.deepcopy(result))
+        if self.persist_dir is not None:
+            os.makedirs(self.persist_dir, exist_ok=True)
+            with open(self._path(key), 'wb') as f:
+                pickle.dump(result, f)
+
+    def _store(self, key, result):
+        with self.lock:
+            self.entries[key] = result
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def invalidate(self):
+        '''
+        Drop the results kept in memory (e.g. to free memory). Not needed when a
+        network changes: the keys hash the content of the network, so the results of
+        the other networks (and of the other sessions) stay valid.
+        '''
+        with self.lock:
+            self.entries.clear()
@@ -0,0 +1,129 @@
+'''author__ = 'Alberto Costa'
+   mail = 'noobsajbot@gmail.com'
+   date = '18 Oct 2026'
+
+   registry of the solver backends used for the Pyomo models: Pyomo solver names,
+   names of the common options (time limit, MIP gap, threads), persistent interface,
+   and fallback to the next available solver when the requested one is missing
+'''
+
+import functools
+import warnings
+
+from lazy_module import LazyModule
+
+
+pyo = LazyModule('pyomo.environ')
+
+
+class SolverLimitReached(RuntimeError):
+    '''
+    The solver stopped at a limit (e.g. the time limit) without a feasible solution
+    '''
+
+
+class SolverBackend:
+    '''
+    A solver usable through Pyomo: {pyomo_name} for SolverFactory, the solver names
+    of the options time_limit (seconds), mip_gap (relative) and threads ({option_names},
+    options without a name are not supported by the solver), and the Pyomo persistent
+    interface of the solver, if any
+    '''
+
+    def __init__(self, name, pyomo_name, option_names, persistent=None):
+        self.name = name
+        self.pyomo_name = pyomo_name
+        self.option_names = option_names
+        self.persistent = persistent
+
+    def solver_options(self, time_limit=None, mip_gap=None, threads=None):
+        '''
+        Options with the names used by the solver (unsupported and None options are skipped)
+        '''
+        values = {'time_limit': time_limit, 'mip_gap': mip_gap, 'threads': threads}
+        return {self.option_names[key]: value for key, value in values.items()
+                if value is not None and key in self.option_names}
+
+    def __repr__(self):
+        return f'SolverBackend({self.name!r}, {self.pyomo_name!r})'
+
+
+backends = dict()
+
+
+def register_backend(name, pyomo_name, option_names, persistent=None):
+    '''
+    Add (or replace) the backend {name} in the registry
+    '''
+    backends[name] = SolverBackend(name, pyomo_name, option_names, persistent)
+    is_available.cache_clear()
+    return backends[name]
+
+
+#order in which the backends are tried when the requested one is not available
+fallback_order = ['highs', 'gurobi', 'cplex', 'cbc', 'glpk', 'scip']
+
+
+@functools.lru_cache(maxsize=None)
+def is_available(name):
+    '''
+    True if the solver of the backend {name} can be used (installed, and licensed)
+    '''
+    backend = backends[name]
+    try:
+        return bool(pyo.SolverFactory(backend.pyomo_name).available(exception_flag=False))
+    except Exception:
+        return False
+
+
+def resolve(name, persistent=False):
+    '''
+    Backend {name} if available, otherwise the first available backend of
+    fallback_order (with a warning). With {persistent} only the backends with a
+    persistent interface are considered.
+    '''
+    if name not in backends:
+        raise ValueError(f"unknown solver backend '{name}', available backends: {list(backends)}")
+    candidates = [name] + [b for b in fallback_order if b != name and b in backends]
+    for candidate in candidates:
+        backend = backends[candidate]
+        if persistent and backend.persistent is None:
+            continue
+        if is_available(candidate):
+            if candidate != name:
+                warnings.warn(f"solver '{name}' is not available, using '{candidate}'")
+            return backend
+    raise RuntimeError(f"no {'persistent ' if persistent else ''}solver available, tried {candidates}")
+
+
+def solver_factory(name, persistent=False, time_limit=None, mip_gap=None, threads=None):
+    '''
+    Pyomo solver of the backend {name} (or of the fallback), with the options set
+    '''
+    backend = resolve(name, persistent)
+    opt = pyo.SolverFactory(backend.persistent if persistent else backend.pyomo_name)
+    opt.options.update(backend.solver_options(time_limit, mip_gap, threads))
+    return opt
+
+
+def scipy_options(time_limit=None, mip_gap=None, threads=None):
+    '''
+    Options of scipy.optimize.milp (HiGHS, single thread) for the matrix models
+    '''
+    options = dict()
+    if time_limit is not None:
+        options['time_limit'] = time_limit
+    if mip_gap is not None:
+        options['mip_rel_gap'] = mip_gap
+    return options
+
+
+#the threads of HiGHS are fixed for the whole process at the first solve, they cannot be set per solve
+register_backend('highs', 'appsi_highs', {'time_limit': 'time_limit', 'mip_gap': 'mip_rel_gap'}, persistent='appsi_highs')
+register_backend('gurobi', 'gurobi', {'time_limit': 'TimeLimit', 'mip_gap': 'MIPGap', 'threads': 'Threads'},
+                 persistent='gurobi_persistent')
+register_backend('cplex', 'cplex', {'time_limit': 'timelimit', 'mip_gap': 'mip_tolerances_mipgap', 'threads': 'threads'},
+                 persistent='cplex_persistent')
+register_backend('cbc', 'cbc', {'time_limit': 'seconds', 'mip_gap': 'ratioGap', 'threads': 'threads'})
+register_backend('glpk', 'glpk', {'time_limit': 'tmlim', 'mip_gap': 'mipgap'})
+register_backend('scip', 'scip', {'time_limit': 'limits/time', 'mip_gap': 'limits/gap', 'threads': 'parallel/maxnthreads'})
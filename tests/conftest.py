@@ -0,0 +1,35 @@
+'''author__ = 'Alberto Costa'
+   mail = 'noobsajbot@gmail.com'
+   date = '18 Oct 2026'
+
+   fixtures shared by the tests (the modules of NIRAD are at the top level of the repository)
+'''
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def no_cache(monkeypatch):
+    #every call computes its result
+    import nirad_utils as shu
+    from result_cache import ResultCache
+    monkeypatch.setattr(shu, 'result_cache', ResultCache(max_entries=0))
+
+
+#small synthetic networks of every generator, two seeds each
+network_params = [(name, params, seed)
+                  for name, params in (('grid', dict(rows=3, cols=4)), ('layered_dag', dict(layers=3, width=3)),
+                                       ('random_geometric', dict(n=12)), ('scale_free', dict(n=12)))
+                  for seed in range(2)]
+
+
+@pytest.fixture(params=network_params, ids=[f'{name}{seed}' for name, params, seed in network_params])
+def network(request):
+    from network_generators import generators
+    name, params, seed = request.param
+    return generators[name](seed=seed, **params)
@@ -0,0 +1,82 @@
+'''author__ = 'Alberto Costa'
+   mail = 'noobsajbot@gmail.com'
+   date = '18 Oct 2026'
+
+   timeout, cancellation and retries of the agent runner, with fake agents
+'''
+
+import time
+
+import pytest
+
+import agent_runner
+import nirad_utils as shu
+
+
+class SlowAgent:
+    #agent whose run takes {seconds}, like a stuck LLM call or solver tool
+    def __init__(self, seconds, answer='answer'):
+        self.seconds = seconds
+        self.answer = answer
+        self.interrupted = False
+
+    def run(self, prompt):
+        time.sleep(self.seconds)
+        return self.answer
+
+    def interrupt(self):
+        self.interrupted = True
+
+
+class RateLimitedAgent:
+    #agent failing with a rate limit error the first {failures} times
+    def __init__(self, failures):
+        self.failures = failures
+        self.calls = 0
+
+    def run(self, prompt):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise RuntimeError('429 rate limit exceeded, retry after 0.01')
+        return 'answer'
+
+
+def test_answer():
+    assert agent_runner.AgentRun(SlowAgent(0.1), 'hi', timeout=5).result() == 'answer'
+
+
+def test_timeout_does_not_wait_for_the_agent():
+    agent = SlowAgent(8)
+    start = time.perf_counter()
+    run = agent_runner.AgentRun(agent, 'hi', timeout=0.5)
+    with pytest.raises(agent_runner.AgentTimeout):
+        run.result()
+    assert time.perf_counter() - start < 2
+    assert agent.interrupted
+
+
+def test_retry_returns_the_timeout_message():
+    start = time.perf_counter()
+    output = shu.retry(SlowAgent(8), 'hi', timeout=0.5)
+    assert time.perf_counter() - start < 2
+    assert output.startswith('Error: no answer within 0.5 seconds')
+
+
+def test_cancel():
+    agent = SlowAgent(8)
+    run = agent_runner.AgentRun(agent, 'hi', timeout=None)
+    time.sleep(0.1)
+    assert not run.done()
+    start = time.perf_counter()
+    run.cancel()
+    with pytest.raises(agent_runner.AgentCancelled):
+        run.result()
+    assert time.perf_counter() - start < 2
+    assert agent.interrupted
+
+
+def test_rate_limit_retries():
+    agent = RateLimitedAgent(2)
+    run = agent_runner.AgentRun(agent, 'hi', timeout=5, base_delay=0.01, max_delay=0.05)
+    assert run.result() == 'answer'
+    assert agent.calls == 3
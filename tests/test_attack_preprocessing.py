@@ -0,0 +1,80 @@
+'''author__ = 'Alberto Costa'
+   mail = 'noobsajbot@gmail.com'
+   date = '18 Oct 2026'
+
+   shortcuts of the worst-case attack from minimum cuts, against the MILP solved without them
+'''
+
+import pytest
+
+import max_flow_native
+import nirad_utils as shu
+
+
+def small_network(arcs, source, terminal):
+    #arcs: (i, j, capacity, cost)
+    return {'n': {None: max(max(i, j) for i, j, capacity, cost in arcs)}, 's': {None: source}, 't': {None: terminal},
+            'A': {None: [(i, j) for i, j, capacity, cost in arcs]},
+            'capacity': {(i, j): capacity for i, j, capacity, cost in arcs},
+            'cost': {(i, j): cost for i, j, capacity, cost in arcs}}
+
+
+def milp_value(data, budget):
+    #worst-case attack MILP, without bound nor warm start
+    return shu.attack_model(data).solve(budget)[0]
+
+
+def flow_without(data, arcs):
+    capacity = dict(data['capacity'])
+    for arc in arcs:
+        capacity[arc] = 0
+    return max_flow_native.max_flow(dict(data, capacity=capacity)).value
+
+
+def check_attack(data, budget, result):
+    assert result['max_flow_value'] == pytest.approx(milp_value(data, budget), abs=1e-6)
+    assert result['total_cost_attack'] == pytest.approx(sum(data['cost'][arc] for arc in result['arcs_destroyed']))
+    assert result['total_cost_attack'] <= budget + 1e-9
+    assert flow_without(data, result['arcs_destroyed']) == pytest.approx(result['max_flow_value'], abs=1e-6)
+
+
+#diamond 1 -> {2, 3} -> 4, cheapest cut {(1,2), (3,4)} of cost 3
+diamond = small_network([(1, 2, 4, 1), (1, 3, 3, 5), (2, 4, 3, 4), (3, 4, 5, 2), (2, 3, 2, 3)], 1, 4)
+
+
+@pytest.mark.parametrize('data, budget', [
+    pytest.param(small_network([(1, 2, 4, 1), (3, 4, 5, 1)], 1, 4), 3, id='no_flow'),
+    pytest.param(diamond, 0.5, id='below_cheapest_arc'),
+    pytest.param(diamond, 3, id='covers_cheapest_cut'),
+    #the minimum capacity cut {(1,2), (1,3)} is emptied by destroying (1,2), (1,3) has no capacity but costs 10
+    pytest.param(small_network([(1, 2, 5, 1), (2, 3, 5, 10), (1, 3, 0, 10)], 1, 3), 2, id='greedy_empties_cut'),
+    ])
+def test_settled_cases(data, budget):
+    result, incumbent = shu.attack_preprocessing(data, budget)
+    assert result is not None and incumbent is None
+    check_attack(data, budget, result)
+
+
+@pytest.mark.parametrize('budget', [1, 2, 4, 8])
+def test_incumbent_and_milp(network, budget, no_cache):
+    #when the instance is not settled, the incumbent is a valid attack bounding the MILP, and the
+    #MILP with the bound and the warm start gives the same flow as without them
+    result, incumbent = shu.attack_preprocessing(network, budget)
+    if result is None:
+        side, cut, destroyed, remaining = incumbent
+        assert sum(network['cost'][arc] for arc in destroyed) <= budget + 1e-9
+        assert flow_without(network, destroyed) <= remaining + 1e-6
+        assert remaining >= milp_value(network, budget) - 1e-6
+    else:
+        check_attack(network, budget, result)
+    check_attack(network, budget, shu.compute_worst_case_attack(network, budget))
+
+
+def test_stats(no_cache):
+    #no instance is built when the minimum cuts settle the attack, one MILP is solved otherwise
+    settled = shu.compute_worst_case_attack(diamond, 3, stats=True)['stats']
+    assert settled['settled_by_preprocessing'] and settled['optimality_iter'] == 0
+    assert settled['variables'] == 0 and 'instance_creation' not in settled['phase_times']
+    solved = shu.compute_worst_case_attack(diamond, 2, stats=True)['stats']
+    assert not solved['settled_by_preprocessing'] and solved['optimality_iter'] == 1
+    assert solved['variables'] > 0 and {'instance_creation', 'optimality_solve'} <= set(solved['phase_times'])
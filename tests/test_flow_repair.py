@@ -0,0 +1,102 @@
+'''author__ = 'Alberto Costa'
+   mail = 'noobsajbot@gmail.com'
+   date = '18 Oct 2026'
+
+   incremental repair of the native max flow after capacity changes, against a fresh solve
+'''
+
+import random
+
+import pytest
+
+import max_flow_native
+import nirad_utils as shu
+from network_generators import generators
+from network_store import NetworkStore
+
+
+def test_update_capacities_matches_fresh_solve(network):
+    rng = random.Random(0)
+    data = dict(network, capacity=dict(network['capacity']))
+    flow_network = max_flow_native.max_flow(data)
+    arcs = data['A'][None]
+    for step in range(20):
+        #decreases (down to 0, below the current flow) and increases
+        changes = []
+        for k in rng.sample(range(len(arcs)), 3):
+            capacity = rng.choice([0.0, rng.uniform(0, data['capacity'][arcs[k]]), data['capacity'][arcs[k]] + rng.randint(1, 10)])
+            data['capacity'][arcs[k]] = capacity
+            changes.append((k, capacity))
+        value = flow_network.update_capacities(changes)
+        assert value == pytest.approx(max_flow_native.max_flow(data).value, abs=1e-6)
+        for arc, flow in zip(arcs, flow_network.flows()):
+            assert -1e-9 <= flow <= data['capacity'][arc] + 1e-9
+
+
+def test_session_repairs_its_flow(no_cache):
+    data = generators['grid'](rows=5, cols=5, seed=1)
+    arcs = data['A'][None]
+    store = NetworkStore([i for i, j in arcs], [j for i, j in arcs], [data['capacity'][arc] for arc in arcs], [data['cost'][arc] for arc in arcs])
+    session = shu.NetworkSession(store, data['n'][None], data['s'][None], data['t'][None])
+    rng = random.Random(0)
+    network = None
+    for step in range(20):
+        arc = rng.choice(arcs)
+        if step % 7 == 6:
+            session.reset_values()
+        elif step % 2:
+            session.change_capacity([arc], [rng.choice([0, 2, 15])])
+        else:
+            session.update_arcs([arc], new_capacities=[rng.choice([0, 2, 15])], new_costs=[1.0])
+        current = session.generate_input_data()
+        flow = session.compute_max_flow(current, backend='native')
+        assert flow['max_flow_value'] == pytest.approx(max_flow_native.max_flow(current).value, abs=1e-6)
+        #the flow network of the session is repaired, not rebuilt
+        assert network is None or session.flow_network is network
+        network = session.flow_network
+
+
+def session_of(data):
+    arcs = data['A'][None]
+    store = NetworkStore([i for i, j in arcs], [j for i, j in arcs], [data['capacity'][arc] for arc in arcs], [data['cost'][arc] for arc in arcs])
+    return shu.NetworkSession(store, data['n'][None], data['s'][None], data['t'][None])
+
+
+def test_data_edited_after_the_flow_is_kept(no_cache):
+    #what-if on the generated data, edited in place after a max flow: the kept flow is not used
+    session = session_of(generators['grid'](rows=4, cols=4, seed=0))
+    data = session.generate_input_data()
+    flows = session.compute_max_flow(data, backend='native')
+    value = flows['max_flow_value']
+    arc = max((arc for arc in data['A'][None] if arc in flows), key=flows.get)
+    data['capacity'][arc] = 0
+    edited = session.compute_max_flow(data, backend='native')['max_flow_value']
+    assert edited == pytest.approx(max_flow_native.max_flow(data).value)
+    assert edited < value
+    #the session network is unchanged
+    assert session.compute_max_flow(session.generate_input_data(), backend='native')['max_flow_value'] == pytest.approx(value)
+
+
+def test_data_edited_before_the_flow_is_not_kept(no_cache):
+    #what-if on the generated data, edited in place before the first max flow: its flow is not kept for the session network
+    session = session_of(generators['grid'](rows=4, cols=4, seed=0))
+    clean = session.generate_input_data()
+    value = max_flow_native.max_flow(clean).value
+    data = session.generate_input_data()
+    for arc in data['A'][None]:
+        if arc[1] == data['t'][None]:
+            data['capacity'][arc] = 0
+    assert session.compute_max_flow(data, backend='native')['max_flow_value'] == 0
+    assert session.compute_max_flow(session.generate_input_data(), backend='native')['max_flow_value'] == pytest.approx(value)
+
+
+def test_repair_stats(no_cache):
+    #the blocking flows of a repair are counted from the previous call
+    session = session_of(generators['grid'](rows=4, cols=4, seed=0))
+    first = session.compute_max_flow(session.generate_input_data(), backend='native', stats=True)['stats']
+    assert not first['repaired'] and first['blocking_flows'] == session.flow_network.blocking_flows
+    arc = session.generate_input_data()['A'][None][0]
+    session.change_capacity([arc], [0])
+    repair = session.compute_max_flow(session.generate_input_data(), backend='native', stats=True)['stats']
+    assert repair['repaired']
+    assert repair['blocking_flows'] == session.flow_network.blocking_flows - first['blocking_flows']
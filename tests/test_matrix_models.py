@@ -0,0 +1,66 @@
+'''author__ = 'Alberto Costa'
+   mail = 'noobsajbot@gmail.com'
+   date = '18 Oct 2026'
+
+   models built as sparse matrices (matrix_models.py) against the Pyomo models
+'''
+
+import numpy as np
+import pytest
+
+import matrix_models
+import max_flow_native
+import nirad_utils as shu
+from network_reduction import ReducedNetwork
+
+
+def test_max_flow_lp(network):
+    #as in max_flow.py, the flow leaving the terminal is not conserved: the LP is solved on the pruned network
+    data = ReducedNetwork(network).data
+    value, flows = matrix_models.max_flow_lp(data)
+    assert value == pytest.approx(max_flow_native.max_flow(data).value, abs=1e-6)
+    assert len(flows) == len(data['A'][None])
+
+
+def test_attack_matches_pyomo(network):
+    data = network
+    rng = np.random.default_rng(0)
+    matrix = matrix_models.AttackMILP(data)
+    pyomo = shu.PyomoAttackModel(data)
+    for gamma in (0.5, 2, 5, 10):
+        #without and with a fortification of the arcs
+        for y in (np.zeros(len(data['A'][None])), rng.uniform(0, 1, len(data['A'][None]))):
+            matrix_value, matrix_z = matrix.solve(gamma, y)
+            pyomo_value, pyomo_z = pyomo.solve(gamma, y)
+            assert matrix_value == pytest.approx(pyomo_value, abs=1e-6)
+            cost = np.array([data['cost'][arc] for arc in data['A'][None]]) + y
+            assert cost[matrix_z == 1].sum() <= gamma + 1e-6
+
+
+def test_fortification_matches_pyomo(network):
+    data = network
+    rng = np.random.default_rng(1)
+    m = len(data['A'][None])
+    matrix = matrix_models.FortificationLP(data, 2)
+    pyomo = shu.PyomoFortificationModel(data, 2)
+    for cut in range(5):
+        z = (rng.uniform(size=m) < 0.3).astype(int)
+        z[rng.integers(m)] = 1
+        matrix.add_cut(z)
+        pyomo.add_cut(z)
+        matrix_tobj, matrix_y = matrix.solve()
+        pyomo_tobj, pyomo_y = pyomo.solve()
+        assert matrix_tobj == pytest.approx(pyomo_tobj, abs=1e-6)
+        assert matrix_y.sum() <= 2 + 1e-6
+
+
+def test_tools_match_pyomo(network, no_cache, monkeypatch):
+    data = network
+    d = 0.5 * max_flow_native.max_flow(data).value
+    results = []
+    for builder in ('pyomo', 'matrix'):
+        monkeypatch.setattr(shu, 'model_builder', builder)
+        results.append((shu.compute_worst_case_attack(data, 3)['max_flow_value'], shu.compute_resilience(data, 2, d)['gamma']))
+    (pyomo_flow, pyomo_gamma), (matrix_flow, matrix_gamma) = results
+    assert matrix_flow == pytest.approx(pyomo_flow, abs=1e-6)
+    assert matrix_gamma == pytest.approx(pyomo_gamma)
@@ -0,0 +1,36 @@
+'''author__ = 'Alberto Costa'
+   mail = 'noobsajbot@gmail.com'
+   date = '18 Oct 2026'
+
+   native max flow (Dinic) against the Pyomo LP
+'''
+
+import pytest
+
+import max_flow_native
+import nirad_utils as shu
+
+
+def test_native_matches_pyomo(network):
+    data = network
+    native = max_flow_native.max_flow(data)
+    pyomo = shu.max_flow_pyomo(data)
+    assert native.value == pytest.approx(pyomo['max_flow_value'], abs=1e-6)
+    #the flow is feasible and its min cut has the capacity of the max flow
+    flows = dict(zip(native.arcs, native.flows()))
+    for arc, flow in flows.items():
+        assert -1e-9 <= flow <= data['capacity'][arc] + 1e-9
+    side, cut = native.min_cut()
+    assert sum(data['capacity'][arc] for arc in cut) == pytest.approx(native.value, abs=1e-6)
+
+
+def test_stats(network, no_cache):
+    #phases and counts measured by compute_max_flow: no instance for the native algorithm, one LP for Pyomo
+    native = shu.compute_max_flow(network, backend='native', stats=True)['stats']
+    assert native['optimality_iter'] == 0 and native['blocking_flows'] >= 1 and not native['repaired']
+    assert native['variables'] == 0 and 'instance_creation' not in native['phase_times']
+    lp = shu.compute_max_flow(network, backend='pyomo', stats=True)['stats']
+    assert lp['optimality_iter'] == 1 and lp['blocking_flows'] == 0
+    assert lp['variables'] > 0 and lp['constraints'] > 0
+    assert {'instance_creation', 'optimality_solve', 'solution_loading'} <= set(lp['phase_times'])
+    assert sum(lp['phase_times'].values()) <= lp['total_time']
@@ -0,0 +1,72 @@
+'''author__ = 'Alberto Costa'
+   mail = 'noobsajbot@gmail.com'
+   date = '18 Oct 2026'
+
+   worst-case attack and resilience with and without the reduction of the network,
+   with sparse node ids, dead ends and series chains
+'''
+
+import pytest
+
+import max_flow_native
+import nirad_utils as shu
+from network_reduction import ReducedNetwork
+
+
+def sparse_network(data):
+    #node k becomes 10k+3, plus a series chain from the source to the terminal, a dead end and an arc entering the source
+    node = lambda k: 10 * k + 3
+    s, t = node(data['s'][None]), node(data['t'][None])
+    a, b, dead = node(data['n'][None] + 1), node(data['n'][None] + 2), node(data['n'][None] + 3)
+    capacity = {(node(i), node(j)): value for (i, j), value in data['capacity'].items()}
+    cost = {(node(i), node(j)): value for (i, j), value in data['cost'].items()}
+    for arc, arc_capacity, arc_cost in (((s, a), 3, 1.5), ((a, b), 5, 0.7), ((b, t), 4, 2.0), ((a, dead), 6, 0.5), ((b, s), 2, 1.0)):
+        capacity[arc] = arc_capacity
+        cost[arc] = arc_cost
+    return {'n': {None: dead}, 's': {None: s}, 't': {None: t}, 'A': {None: list(capacity)}, 'capacity': capacity, 'cost': cost}
+
+
+@pytest.fixture
+def data(network):
+    return sparse_network(network)
+
+
+def test_reduction_removes_arcs(data):
+    #the dead end and the arc entering the source are pruned, the chain is contracted
+    assert len(ReducedNetwork(data)) <= len(data['A'][None]) - 2
+    assert len(ReducedNetwork(data, series=True)) <= len(data['A'][None]) - 4
+
+
+def flow_without(data, arcs):
+    capacity = dict(data['capacity'])
+    for arc in arcs:
+        capacity[arc] = 0
+    return max_flow_native.max_flow(dict(data, capacity=capacity)).value
+
+
+@pytest.mark.parametrize('budget', [1, 3, 6])
+def test_attack_reduced_matches_unreduced(data, budget, no_cache, monkeypatch):
+    results = []
+    for reduce in (True, False):
+        monkeypatch.setattr(shu, 'reduce_networks', reduce)
+        results.append(shu.compute_worst_case_attack(data, budget))
+    reduced, unreduced = results
+    assert reduced['max_flow_value'] == pytest.approx(unreduced['max_flow_value'], abs=1e-6)
+    #the attack is given on the arcs (and node ids) of the input
+    assert set(reduced['arcs_destroyed']) <= set(data['A'][None])
+    assert reduced['total_cost_attack'] == pytest.approx(sum(data['cost'][arc] for arc in reduced['arcs_destroyed']))
+    assert reduced['total_cost_attack'] <= budget + 1e-9
+    assert flow_without(data, reduced['arcs_destroyed']) == pytest.approx(reduced['max_flow_value'], abs=1e-6)
+
+
+def test_resilience_reduced_matches_unreduced(data, no_cache, monkeypatch):
+    F = 2
+    d = 0.5 * max_flow_native.max_flow(data).value
+    results = []
+    for reduce in (True, False):
+        monkeypatch.setattr(shu, 'reduce_networks', reduce)
+        results.append(shu.compute_resilience(data, F, d))
+    reduced, unreduced = results
+    assert reduced['gamma'] == pytest.approx(unreduced['gamma'])
+    assert set(reduced['fortification']) <= set(data['A'][None])
+    assert sum(reduced['fortification'].values()) <= F + 1e-6
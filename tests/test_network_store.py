@@ -0,0 +1,36 @@
+'''author__ = 'Alberto Costa'
+   mail = 'noobsajbot@gmail.com'
+   date = '18 Oct 2026'
+
+   loading of the network files, with the binary cache
+'''
+
+import os
+
+import numpy as np
+
+from network_store import load_network
+
+
+def write(path, rows):
+    with open(path, 'w') as f:
+        f.write(''.join(f'{i} {j} {capacity} {cost}\n' for i, j, capacity, cost in rows))
+
+
+def test_binary_cache_of_two_files(tmp_path):
+    #two files with the same size and modification time sharing the cache directory
+    first, second = tmp_path / 'first.txt', tmp_path / 'second.txt'
+    write(first, [(1, 2, 5, 1), (2, 3, 4, 2)])
+    write(second, [(1, 2, 7, 3), (2, 3, 6, 1)])
+    for path in (first, second):
+        os.utime(path, ns=(10**18, 10**18))
+    cache_dir = str(tmp_path / 'cache')
+    for repeat in range(2):
+        for path, capacity in ((first, [5, 4]), (second, [7, 6])):
+            network, nodes, source, terminal = load_network(str(path), cache_dir=cache_dir)
+            assert network.capacity.tolist() == capacity
+            assert (nodes, source, terminal) == (3, 1, 3)
+    #the last file parsed is read from the cache (memory-mapped)
+    network = load_network(str(second), cache_dir=cache_dir)[0]
+    assert isinstance(network.base_capacity, np.memmap) or isinstance(network.base_capacity.base, np.memmap)
+    assert network.capacity.tolist() == [7, 6]
@@ -0,0 +1,60 @@
+'''author__ = 'Alberto Costa'
+   mail = 'noobsajbot@gmail.com'
+   date = '18 Oct 2026'
+
+   resilience on fixed networks: known values, adaptive and plain grids, precision
+'''
+
+import pytest
+
+import max_flow_native
+import nirad_utils as shu
+from network_generators import generators
+
+
+#network, fortification budget F (d is half the max flow) and resilience with the default tolerance 0.1
+cases = [
+    pytest.param(('layered_dag', dict(layers=4, width=5), 0), 2, 4.7, id='layered_dag0'),
+    pytest.param(('grid', dict(rows=4, cols=4), 1), 3, 3.7, id='grid1'),
+    pytest.param(('scale_free', dict(n=15), 2), 1, 2.7, id='scale_free2'),
+    pytest.param(('random_geometric', dict(n=15), 0), 2, 6.1, id='random_geometric0'),
+    ]
+
+
+def network_of(spec):
+    name, params, seed = spec
+    data = generators[name](seed=seed, **params)
+    return data, 0.5 * max_flow_native.max_flow(data).value
+
+
+@pytest.mark.parametrize('spec, F, gamma', cases)
+@pytest.mark.parametrize('adaptive', [False, True])
+def test_known_values(spec, F, gamma, adaptive, no_cache):
+    data, d = network_of(spec)
+    result = shu.compute_resilience(data, F, d, adaptive=adaptive)
+    assert result['gamma'] == pytest.approx(gamma)
+    assert 0 < result['precision'] <= 0.1 + 1e-9
+    assert sum(result['fortification'].values()) <= F + 1e-6
+
+
+@pytest.mark.parametrize('spec, F, gamma', cases)
+@pytest.mark.parametrize('settings', [dict(adaptive=False), dict(adaptive=True), dict(relative_tolerance=0.05)],
+                         ids=['plain', 'adaptive', 'relative'])
+def test_within_precision(spec, F, gamma, settings, no_cache):
+    #the resilience computed with a fine tolerance is within the precision claimed
+    data, d = network_of(spec)
+    exact = shu.compute_resilience(data, F, d, tolerance=0.001)
+    result = shu.compute_resilience(data, F, d, **settings)
+    assert result['gamma'] <= exact['gamma'] + 1e-9
+    assert exact['gamma'] + exact['precision'] <= result['gamma'] + result['precision'] + 1e-9
+
+
+def test_d_above_the_max_flow(no_cache):
+    data = generators['grid'](rows=3, cols=4, seed=0)
+    max_flow_value = max_flow_native.max_flow(data).value
+    result = shu.compute_resilience(data, 2, max_flow_value + 1)
+    assert result['feasible'] is False
+    assert result['gamma'] is None and result['precision'] is None
+    #d equal to the max flow: withstood without attack
+    result = shu.compute_resilience(data, 2, max_flow_value)
+    assert 'feasible' not in result and result['gamma'] >= 0
@@ -0,0 +1,41 @@
+'''author__ = 'Alberto Costa'
+   mail = 'noobsajbot@gmail.com'
+   date = '18 Oct 2026'
+
+   resilience sweep on the process pool
+'''
+
+import threading
+import time
+
+import pytest
+
+import max_flow_native
+import nirad_utils as shu
+from network_generators import generators
+
+
+def test_sweep_with_the_cache_lock_held(no_cache, monkeypatch):
+    #another thread (e.g. another GUI session) holds the lock of the result cache when the workers start
+    monkeypatch.setattr(shu, 'model_builder', 'matrix')
+    data = generators['grid'](rows=3, cols=4, seed=0)
+    d = 0.5 * max_flow_native.max_flow(data).value
+    results = []
+    release = threading.Event()
+
+    def hold_lock():
+        with shu.result_cache.lock:
+            release.wait(1)
+
+    holder = threading.Thread(target=hold_lock)
+    holder.start()
+    time.sleep(0.1)
+    sweep = threading.Thread(target=lambda: results.append(shu.compute_resilience_sweep(data, [1, 2], [d], max_workers=2)), daemon=True)
+    sweep.start()
+    sweep.join(120)
+    release.set()
+    holder.join()
+    assert not sweep.is_alive(), 'the sweep is stuck'
+    table = results[0]
+    for F, gamma in zip(table['F'], table['gamma']):
+        assert gamma == pytest.approx(shu.compute_resilience(data, F, d)['gamma'])